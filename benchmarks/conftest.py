@@ -0,0 +1,230 @@
+"""Benchmarks of setuptools-rust's own overhead, run with ``nox -s bench``.
+
+`cargo` and `rustc` are replaced by ``fake_toolchain.py``, which replays recorded
+output instantly, so only the Python side of a build is measured.
+"""
+
+import copy
+import functools
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+import pytest
+from setuptools import Distribution
+
+from setuptools_rust import Binding, RustExtension, build_rust, rustc_info
+
+FAKE_TOOLCHAIN = Path(__file__).with_name("fake_toolchain.py")
+
+# Number of registry dependencies of each synthetic crate.
+DEPENDENCIES = 50
+
+
+def clear_toolchain_caches() -> None:
+    for cached in (
+        rustc_info.get_rust_target_info,
+        rustc_info.get_rust_target_list,
+        rustc_info.get_cargo_version,
+        rustc_info._rust_version_verbose,
+    ):
+        cached.cache_clear()
+
+
+@pytest.fixture
+def fake_toolchain(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    """Puts the fake `cargo` and `rustc` first on `PATH`, with setuptools-rust's
+    persistent caches in a fresh directory."""
+    if sys.platform == "win32":
+        pytest.skip("the fake toolchain is run by shell scripts")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for tool in ("cargo", "rustc"):
+        script = bin_dir / tool
+        script.write_text(
+            f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_TOOLCHAIN}" {tool} "$@"\n'
+        )
+        script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("CARGO", "cargo")
+    monkeypatch.setenv("SETUPTOOLS_RUST_CACHE_DIR", str(tmp_path / "cache"))
+    for variable in ("CARGO_BUILD_TARGET", "CARGO_TARGET_DIR", "RUSTUP_TOOLCHAIN"):
+        monkeypatch.delenv(variable, raising=False)
+    clear_toolchain_caches()
+    yield bin_dir
+    clear_toolchain_caches()
+
+
+def artifact_message(package_id: str, name: str, kind: str, path: Path) -> str:
+    return json.dumps(
+        {
+            "reason": "compiler-artifact",
+            "package_id": package_id,
+            "target": {"kind": [kind], "crate_types": [kind], "name": name},
+            "filenames": [str(path)],
+            "executable": None,
+            "fresh": True,
+        }
+    )
+
+
+def diagnostic_message(package_id: str, index: int) -> str:
+    return json.dumps(
+        {
+            "reason": "compiler-message",
+            "package_id": package_id,
+            "message": {
+                "rendered": f"warning: unused variable: `x{index}`",
+                "level": "warning",
+                "spans": [],
+                "children": [],
+            },
+        }
+    )
+
+
+def make_project(
+    root: Path, extensions: int, *, artifact_size: int = 256 * 1024
+) -> List[RustExtension]:
+    """Creates `extensions` crates in a workspace at `root`, with the recorded
+    `cargo metadata` output and build messages of each, and an artifact of
+    `artifact_size` bytes. Returns an extension module for each crate."""
+    release_dir = root / "target" / "release"
+    (release_dir / "deps").mkdir(parents=True)
+    (root / "Cargo.toml").write_text('[workspace]\nmembers = ["crates/*"]\n')
+    (root / "Cargo.lock").write_text("version = 3\n")
+
+    dependency_ids = [
+        f"registry+https://github.com/rust-lang/crates.io-index#dep_{j}@1.0.0"
+        for j in range(DEPENDENCIES)
+    ]
+    dependencies: List[Dict[str, Any]] = [
+        {
+            "id": package_id,
+            "name": f"dep_{j}",
+            "version": "1.0.0",
+            "source": "registry+https://github.com/rust-lang/crates.io-index",
+            "manifest_path": f"/registry/dep_{j}-1.0.0/Cargo.toml",
+            "targets": [{"name": f"dep_{j}", "kind": ["lib"]}],
+        }
+        for j, package_id in enumerate(dependency_ids)
+    ]
+
+    exts = []
+    for i in range(extensions):
+        name = f"ext_{i}"
+        crate = root / "crates" / name
+        crate.mkdir(parents=True)
+        (crate / "Cargo.toml").write_text(
+            f'[package]\nname = "{name}"\nversion = "0.1.0"\n\n'
+            '[lib]\ncrate-type = ["cdylib"]\n'
+        )
+        package_id = f"path+file://{crate}#{name}@0.1.0"
+        metadata = {
+            "packages": [
+                {
+                    "id": package_id,
+                    "name": name,
+                    "version": "0.1.0",
+                    "source": None,
+                    "manifest_path": str(crate / "Cargo.toml"),
+                    "targets": [{"name": name, "kind": ["cdylib"]}],
+                },
+                *dependencies,
+            ],
+            "resolve": {
+                "root": package_id,
+                "nodes": [
+                    {
+                        "id": package_id,
+                        "deps": [
+                            {"pkg": dep, "dep_kinds": [{"kind": None}]}
+                            for dep in dependency_ids
+                        ],
+                    },
+                    *({"id": dep, "deps": []} for dep in dependency_ids),
+                ],
+            },
+            "workspace_root": str(root),
+            "target_directory": str(root / "target"),
+        }
+        (crate / "metadata.json").write_text(json.dumps(metadata))
+
+        artifact = release_dir / f"lib{name}.so"
+        artifact.write_bytes(os.urandom(artifact_size))
+        messages = [
+            artifact_message(dep, f"dep_{j}", "lib", release_dir / "deps" / "x.rlib")
+            for j, dep in enumerate(dependency_ids)
+        ]
+        messages += [diagnostic_message(package_id, j) for j in range(10)]
+        messages.append(artifact_message(package_id, name, "cdylib", artifact))
+        messages.append(json.dumps({"reason": "build-finished", "success": True}))
+        (crate / "messages.jsonl").write_text("\n".join(messages) + "\n")
+
+        exts.append(
+            RustExtension(
+                f"pkg.{name}",
+                str(crate / "Cargo.toml"),
+                binding=Binding.NoBinding,
+                quiet=True,
+            )
+        )
+    (root / "pkg").mkdir()
+    (root / "pkg" / "__init__.py").write_text("")
+    return exts
+
+
+@pytest.fixture
+def project(
+    fake_toolchain: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Callable[..., List[RustExtension]]:
+    """`make_project` in a fresh directory, which becomes the working directory."""
+    root = tmp_path / "project"
+    root.mkdir()
+    monkeypatch.chdir(root)
+    return functools.partial(make_project, root)
+
+
+@pytest.fixture
+def new_build_rust() -> Callable[[List[RustExtension]], build_rust]:
+    """Makes a finalized `build_rust` command for copies of the given extensions,
+    with nothing cached in memory, as in a fresh process."""
+
+    def new(exts: List[RustExtension]) -> build_rust:
+        clear_toolchain_caches()
+        dist = Distribution()
+        dist.rust_extensions = [copy.copy(ext) for ext in exts]  # type: ignore[attr-defined]
+        cmd = build_rust(dist)
+        cmd.ensure_finalized()
+        return cmd
+
+    return new
+
+
+@pytest.fixture(scope="session")
+def message_log() -> List[str]:
+    """100,000 lines of cargo messages from a build of 1,000 packages."""
+    lines = []
+    for i in range(1000):
+        package_id = (
+            f"registry+https://github.com/rust-lang/crates.io-index#dep_{i}@1.0.0"
+        )
+        lines += [diagnostic_message(package_id, j) for j in range(97)]
+        lines.append(
+            json.dumps(
+                {
+                    "reason": "build-script-executed",
+                    "package_id": package_id,
+                    "out_dir": f"/target/release/build/dep_{i}-0123456789abcdef/out",
+                }
+            )
+        )
+        lines.append(
+            artifact_message(package_id, f"dep_{i}", "lib", Path(f"/deps/dep_{i}.rlib"))
+        )
+        lines.append(
+            artifact_message(package_id, f"dep_{i}", "cdylib", Path(f"/dep_{i}.so"))
+        )
+    return lines
@@ -0,0 +1,70 @@
+"""Stand-in for `cargo` and `rustc`, replaying recorded output.
+
+Invoked as ``fake_toolchain.py cargo ...`` or ``fake_toolchain.py rustc ...``.
+`cargo metadata` prints the ``metadata.json`` next to the manifest, and cargo
+builds print the JSON messages recorded in ``messages.jsonl``.
+"""
+
+import sys
+from pathlib import Path
+
+RUSTC_VV = """\
+rustc 1.80.0 (051478957 2024-07-21)
+binary: rustc
+commit-hash: 051478957371ee0084a7c0913941d2a8c4757bb9
+commit-date: 2024-07-21
+host: x86_64-unknown-linux-gnu
+release: 1.80.0
+LLVM version: 18.1.7
+"""
+
+RUSTC_CFG = """\
+debug_assertions
+panic="unwind"
+target_arch="x86_64"
+target_endian="little"
+target_env="gnu"
+target_family="unix"
+target_os="linux"
+target_pointer_width="64"
+target_vendor="unknown"
+unix
+"""
+
+TARGET_LIST = """\
+aarch64-apple-darwin
+aarch64-unknown-linux-gnu
+x86_64-apple-darwin
+x86_64-pc-windows-msvc
+x86_64-unknown-linux-gnu
+"""
+
+
+def _replay(args: list, name: str) -> None:
+    manifest = Path(args[args.index("--manifest-path") + 1])
+    sys.stdout.write((manifest.parent / name).read_text())
+
+
+def main(tool: str, args: list) -> int:
+    if tool == "rustc":
+        if args == ["-Vv"]:
+            sys.stdout.write(RUSTC_VV)
+        elif args[:2] == ["--print", "cfg"]:
+            sys.stdout.write(RUSTC_CFG)
+        elif args[:2] == ["--print", "target-list"]:
+            sys.stdout.write(TARGET_LIST)
+        else:
+            return 1
+    elif args == ["-V"]:
+        print("cargo 1.80.0 (376290515 2024-07-16)")
+    elif args[0] == "metadata":
+        _replay(args, "metadata.json")
+    elif args[0] in ("build", "rustc"):
+        _replay(args, "messages.jsonl")
+    else:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1], sys.argv[2:]))
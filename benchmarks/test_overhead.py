@@ -0,0 +1,145 @@
+"""Benchmarks of the Python side of a build; see ``conftest.py``."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from setuptools import Distribution
+
+from setuptools_rust._cargo_messages import CargoMessageIndex
+from setuptools_rust._install import (
+    install_is_current,
+    place_file,
+    record_install,
+    sync_tree,
+)
+from setuptools_rust.setuptools_ext import pyprojecttoml_config
+
+# Numbers of extensions in the synthetic projects.
+SCALES = [1, 10, 50]
+
+LARGE_ARTIFACT = 64 * 1024 * 1024
+
+
+@pytest.mark.parametrize(
+    "module", ["setuptools_rust", "setuptools_rust.setuptools_ext"]
+)
+def test_import(benchmark, module):
+    # setuptools imports `setuptools_rust.setuptools_ext` for every build through
+    # its `finalize_distribution_options` entry point, Rust or not.
+    benchmark.pedantic(
+        subprocess.check_call,
+        args=([sys.executable, "-c", f"import {module}"],),
+        rounds=10,
+        warmup_rounds=1,
+    )
+
+
+@pytest.mark.parametrize("extensions", SCALES)
+def test_pyprojecttoml_config(benchmark, tmp_path, monkeypatch, extensions):
+    monkeypatch.chdir(tmp_path)
+    config = "[tool.setuptools-rust]\nparallel = 4\nskip-unchanged = true\n"
+    for i in range(extensions):
+        config += (
+            "\n[[tool.setuptools-rust.ext-modules]]\n"
+            f'target = "pkg.ext_{i}"\n'
+            f'path = "crates/ext_{i}/Cargo.toml"\n'
+            'binding = "NoBinding"\n'
+            'features = ["a", "b"]\n'
+        )
+    (tmp_path / "pyproject.toml").write_text(config)
+
+    benchmark(lambda: pyprojecttoml_config(Distribution()))
+
+
+@pytest.mark.parametrize("disk_cache", [False, True], ids=["cold", "warm"])
+@pytest.mark.parametrize("extensions", SCALES)
+def test_preflight(
+    benchmark, project, new_build_rust, monkeypatch, extensions, disk_cache
+):
+    if not disk_cache:
+        monkeypatch.setenv("SETUPTOOLS_RUST_METADATA_CACHE", "0")
+        monkeypatch.setenv("SETUPTOOLS_RUST_TOOLCHAIN_CACHE", "0")
+    exts = project(extensions)
+
+    benchmark.pedantic(
+        lambda cmd: cmd._preflight(),
+        setup=lambda: ((new_build_rust(exts),), {}),
+        rounds=5,
+        warmup_rounds=1,
+    )
+
+
+def test_message_index(benchmark, message_log):
+    def index():
+        messages = CargoMessageIndex()
+        messages.add_lines(message_log)
+        return messages.artifacts(
+            "registry+https://github.com/rust-lang/crates.io-index#dep_999@1.0.0",
+            kinds={"cdylib", "dylib"},
+        )
+
+    assert benchmark(index) == ["/dep_999.so"]
+
+
+def test_run_cargo_messages(benchmark, project, new_build_rust, message_log):
+    """Streaming a 100,000 line build log from cargo into the message index."""
+    [ext] = project(1)
+    crate = Path(ext.path).parent
+    (crate / "messages.jsonl").write_text("\n".join(message_log) + "\n")
+    cmd = new_build_rust([ext])
+    command = ["cargo", "build", "--manifest-path", ext.path]
+
+    benchmark.pedantic(
+        lambda: cmd._run_cargo(command, dict(os.environ), quiet=True, cargo_run=0),
+        rounds=5,
+    )
+
+
+@pytest.fixture
+def large_artifact(tmp_path):
+    path = tmp_path / "libbig.so"
+    path.write_bytes(os.urandom(LARGE_ARTIFACT))
+    return str(path)
+
+
+@pytest.mark.parametrize("strategy", ["copy", "auto"])
+def test_place_large_artifact(benchmark, tmp_path, large_artifact, strategy):
+    dest = str(tmp_path / "big.so")
+    benchmark(place_file, large_artifact, dest, strategy, may_link=True)
+
+
+def test_unchanged_large_artifact(benchmark, tmp_path, large_artifact):
+    dest = str(tmp_path / "big.so")
+    record = tmp_path / "record.json"
+    place_file(large_artifact, dest, "copy", may_link=False)
+    record_install(record, large_artifact, dest, [])
+
+    assert benchmark(install_is_current, record, large_artifact, dest, [])
+
+
+def test_sync_unchanged_generated_files(benchmark, tmp_path):
+    source = tmp_path / "out"
+    for i in range(20):
+        directory = source / f"dir_{i}"
+        directory.mkdir(parents=True)
+        for j in range(100):
+            (directory / f"file_{j}.py").write_text(f"VALUE = {j}\n" * 100)
+    dest = tmp_path / "pkg"
+    sync_tree(source, dest)
+
+    assert len(benchmark(sync_tree, source, dest)) == 2000
+
+
+@pytest.mark.parametrize("extensions", SCALES)
+def test_build(benchmark, project, new_build_rust, extensions):
+    exts = project(extensions)
+
+    benchmark.pedantic(
+        lambda cmd: cmd.run(),
+        setup=lambda: ((new_build_rust(exts),), {}),
+        rounds=3,
+        warmup_rounds=1,
+    )
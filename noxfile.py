@@ -229,6 +229,12 @@ def test(session: nox.Session):
     session.run("pytest", "setuptools_rust", "tests", *session.posargs)
 
 
+@nox.session()
+def bench(session: nox.Session):
+    session.install("pytest", "pytest-benchmark", ".")
+    session.run("pytest", "benchmarks", *session.posargs)
+
+
 PYODIDE_VERSION = "0.29.1"
 EMSCRIPTEN_DIR = Path("./emscripten").resolve()
 
@@ -1,6 +1,37 @@
-from .build import build_rust
-from .clean import clean_rust
-from .extension import Binding, RustBin, RustExtension, Strip
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
 from .version import version as __version__  # noqa: F401
 
+if TYPE_CHECKING:
+    from .build import build_rust
+    from .clean import clean_rust
+    from .extension import Binding, RustBin, RustExtension, Strip
+
 __all__ = ("Binding", "RustBin", "RustExtension", "Strip", "build_rust", "clean_rust")
+
+# setuptools imports this package for every project through the
+# `pyprojecttoml_config` hook, so the modules defining these are only imported
+# when one of them is first used.
+_LAZY_ATTRIBUTES = {
+    "Binding": ".extension",
+    "RustBin": ".extension",
+    "RustExtension": ".extension",
+    "Strip": ".extension",
+    "build_rust": ".build",
+    "clean_rust": ".clean",
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
@@ -0,0 +1,215 @@
+"""Persistent caches shared between setuptools-rust processes.
+
+Caches live in ``SETUPTOOLS_RUST_CACHE_DIR`` if set, otherwise in the platform's
+user cache directory. Any failure to read or write a cache is treated as a miss,
+so a broken cache can never fail a build.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_CACHE_VERSION = 1
+
+
+def cache_dir() -> Path:
+    """The root directory for setuptools-rust's persistent caches."""
+    configured = os.environ.get("SETUPTOOLS_RUST_CACHE_DIR")
+    if configured:
+        return Path(configured)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+        return Path(base, "setuptools-rust", "Cache")
+    if sys.platform == "darwin":
+        return Path(os.path.expanduser("~/Library/Caches/setuptools-rust"))
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(base, "setuptools-rust")
+
+
+def cache_enabled(variable: str) -> bool:
+    """Whether the cache switched by the environment variable `variable` is enabled.
+
+    Caches are enabled unless the variable is set to a false-like value.
+    """
+    return os.environ.get(variable, "1").lower() not in ("0", "false", "no", "off")
+
+
+def target_cache_root(setting: Union[str, bool, None]) -> Optional[Path]:
+    """Where to keep persistent cargo target directories, given a ``target-cache``
+    setting: a directory, or a boolean to use (or not) the default location.
+
+    >>> target_cache_root("off") is None
+    True
+    >>> target_cache_root("/srv/targets") == Path("/srv/targets")
+    True
+    """
+    if isinstance(setting, str) and setting.lower() in ("1", "true", "yes", "on"):
+        setting = True
+    if not setting or str(setting).lower() in ("0", "false", "no", "off"):
+        return None
+    if setting is True:
+        return cache_dir() / "target"
+    return Path(setting)
+
+
+@contextlib.contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Holds an exclusive lock on the file at `path` (created if needed) for the
+    duration of the block, waiting for any other process holding it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        # Windows locks a byte range from the current position.
+        f.seek(0)
+        if not _try_lock(f.fileno()):
+            logger.info("waiting for lock on %s", path)
+            _lock(f.fileno())
+        try:
+            yield
+        finally:
+            _unlock(f.fileno())
+
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _lock(fd: int) -> None:
+        # LK_LOCK only retries for about ten seconds before failing.
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                pass
+
+    def _unlock(fd: int) -> None:
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _lock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def key_digest(*parts: Any) -> str:
+    """Digest of JSON-serializable key parts, used as a cache entry name."""
+    payload = json.dumps(parts, sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def files_digests(paths: List[str]) -> Dict[str, Optional[str]]:
+    """Content digests of `paths`; missing files have a digest of `None`."""
+    digests: Dict[str, Optional[str]] = {}
+    for path in paths:
+        try:
+            digests[path] = file_digest(path)
+        except OSError:
+            digests[path] = None
+    return digests
+
+
+def cargo_config_paths(directory: Optional[Path] = None) -> List[str]:
+    """All the places cargo looks for configuration when run from `directory`
+    (defaulting to the current directory), whether or not they exist."""
+    directory = Path.cwd() if directory is None else directory
+    cargo_home = Path(os.environ.get("CARGO_HOME", os.path.expanduser("~/.cargo")))
+    paths = []
+    for dot_cargo in (
+        *(p / ".cargo" for p in (directory, *directory.parents)),
+        cargo_home,
+    ):
+        paths.append(str(dot_cargo / "config"))
+        paths.append(str(dot_cargo / "config.toml"))
+    # `CARGO_HOME` is usually `~/.cargo`, which may also be an ancestor
+    return list(dict.fromkeys(paths))
+
+
+class DiskCache:
+    """A directory of JSON entries, evicting the least recently used entries once
+    their total size exceeds `max_bytes`."""
+
+    def __init__(self, name: str, max_bytes: int):
+        self.directory = cache_dir() / name
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self.directory / f"{key}.json"
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            # Record the access for least-recently-used eviction.
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("version") != _CACHE_VERSION:
+            return None
+        return entry.get("value")
+
+    def put(self, key: str, value: Any) -> None:
+        path = self.directory / f"{key}.json"
+        temp_path = self.directory / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": _CACHE_VERSION, "value": value}, f)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        # Oldest first; the entry just written is the newest so is evicted last.
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,147 @@
+"""Incremental parsing of the JSON messages cargo prints during a build, and of
+its ``--timings`` reports."""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class CargoMessageIndex:
+    """The parts of a cargo build's JSON messages which setuptools-rust uses:
+    the artifacts and the build script out directory of each package, and the
+    ``timing-info`` messages of ``--timings=json``.
+
+    Lines are added one at a time as cargo prints them, so the full output of
+    a build is never held in memory.
+
+    >>> index = CargoMessageIndex()
+    >>> index.add_lines([
+    ...    '{"some_irrelevant_message": []}',
+    ...    '{"reason":"compiler-artifact","package_id":"some_id","target":{"kind":["cdylib"]},"filenames":["/some/path/baz.so"]}',
+    ...    '{"reason":"compiler-artifact","package_id":"some_id","target":{"kind":["dylib", "rlib"]},"filenames":["/file/two/baz.dylib", "/file/two/baz.rlib"]}',
+    ...    '{"reason":"compiler-artifact","package_id":"some_other_id","target":{"kind":["cdylib"]},"filenames":["/not/this.so"]}',
+    ...    '{"reason":"build-script-executed","package_id":"some_id","out_dir":"/target/build/baz-1/out"}',
+    ... ])
+    >>> index.artifacts("some_id", kinds={"cdylib", "dylib"})
+    ['/some/path/baz.so', '/file/two/baz.dylib']
+    >>> index.artifacts("some_id", kinds={"rlib"})
+    ['/file/two/baz.rlib']
+    >>> index.out_dir("some_id") == Path("/target/build/baz-1/out")
+    True
+    >>> index.out_dir("some_other_id") is None
+    True
+
+    Executables may be reported without any `filenames`:
+
+    >>> index.add_line(
+    ...     '{"reason": "compiler-artifact", "package_id": "some_id", "target": {"kind": ["bin"]}, "filenames":[], "executable": "/target/debug/some_exe"}'
+    ... )["reason"]
+    'compiler-artifact'
+    >>> index.artifacts("some_id", kinds={"bin"})
+    ['/target/debug/some_exe']
+    >>> index.add_line(
+    ...     '{"reason": "timing-info", "package_id": "some_id", "target": {"name": "baz"}, "mode": "build", "duration": 1.5}'
+    ... )["duration"]
+    1.5
+    >>> unit_timings(index.timings)
+    [(1.5, 'baz')]
+    """
+
+    def __init__(self) -> None:
+        # (kind, filename) pairs of the artifacts built for each package id
+        self._artifacts: Dict[str, List[Tuple[str, str]]] = {}
+        self._out_dirs: Dict[str, Optional[str]] = {}
+        self.timings: List[Dict[str, Any]] = []
+
+    def add_line(self, line: str) -> Optional[Dict[str, Any]]:
+        """Indexes one line of cargo's output, returning the parsed message if it
+        was an artifact, build script or timing message."""
+        # only bother parsing messages that look like a match
+        if (
+            "compiler-artifact" not in line
+            and "build-script-executed" not in line
+            and "timing-info" not in line
+        ):
+            return None
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(message, dict):
+            return None
+
+        reason = message.get("reason")
+        if reason == "compiler-artifact":
+            filenames = message["filenames"]
+            if not filenames and message.get("executable"):
+                # Use message["executable"] as the filename when filenames are empty
+                # See https://github.com/PyO3/maturin/issues/2370
+                filenames = [message["executable"]]
+            self._artifacts.setdefault(message["package_id"], []).extend(
+                zip(message["target"]["kind"], filenames)
+            )
+        elif reason == "build-script-executed":
+            # A later build script run for the same package supersedes earlier ones.
+            self._out_dirs[message["package_id"]] = message.get("out_dir")
+        elif reason == "timing-info":
+            self.timings.append(message)
+        else:
+            return None
+        return message
+
+    def add_lines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.add_line(line)
+
+    def artifacts(self, package_id: str, *, kinds: Set[str]) -> List[str]:
+        """The files of the given `kinds` built for `package_id`, in build order."""
+        return [
+            filename
+            for kind, filename in self._artifacts.get(package_id, [])
+            if kind in kinds
+        ]
+
+    def out_dir(self, package_id: str) -> Optional[Path]:
+        """The out directory of the build script of `package_id`, if it has one."""
+        out_dir = self._out_dirs.get(package_id)
+        return None if out_dir is None else Path(out_dir)
+
+
+def unit_timings(messages: Iterable[Dict[str, Any]]) -> List[Tuple[float, str]]:
+    """The duration and name of each unit in cargo's ``timing-info`` messages."""
+    timings = []
+    for message in messages:
+        name = message["target"]["name"]
+        if message.get("mode", "build") != "build":
+            name += f" ({message['mode']})"
+        timings.append((message["duration"], name))
+    return timings
+
+
+_HTML_UNIT_DATA = re.compile(r"^const UNIT_DATA = (\[.*?^\]);$", re.M | re.S)
+
+
+def html_unit_timings(html: str) -> List[Tuple[float, str]]:
+    r"""The duration and name of each unit in a ``--timings=html`` report, which
+    embeds them as a JSON array; empty if the report can't be read.
+
+    >>> html_unit_timings(
+    ...     '<script>\nconst UNIT_DATA = [\n'
+    ...     '  {"name": "syn", "version": "2.0.0", "target": "", "duration": 2.5},\n'
+    ...     '  {"name": "baz", "version": "0.1.0", "target": " build-script (run)", "duration": 0.5}\n'
+    ...     '];\n</script>'
+    ... )
+    [(2.5, 'syn v2.0.0'), (0.5, 'baz v0.1.0 build-script (run)')]
+    """
+    match = _HTML_UNIT_DATA.search(html)
+    if match is None:
+        return []
+    try:
+        units = json.loads(match.group(1))
+        return [
+            (unit["duration"], f"{unit['name']} v{unit['version']}{unit['target']}")
+            for unit in units
+        ]
+    except (ValueError, KeyError, TypeError):
+        return []
@@ -0,0 +1,90 @@
+"""Caching of rustc invocations with sccache, through cargo's ``RUSTC_WRAPPER``."""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+from typing import Any, Dict, NamedTuple, Optional
+
+from setuptools.errors import SetupError
+
+from ._utils import check_subprocess_output
+
+logger = logging.getLogger(__name__)
+
+COMPILER_CACHES = ("auto", "sccache", "off")
+
+
+class CompilerCache(NamedTuple):
+    """An sccache executable, and the directory it should cache in (``None`` for
+    sccache's own default)."""
+
+    executable: str
+    directory: Optional[str]
+
+    def apply(self, env_vars: Dict[str, str]) -> None:
+        """Configures cargo in the build environment `env_vars` to use the cache,
+        unless it already has a rustc wrapper."""
+        if "RUSTC_WRAPPER" in env_vars:
+            return
+        env_vars["RUSTC_WRAPPER"] = self.executable
+        if self.directory is not None:
+            env_vars.setdefault("SCCACHE_DIR", os.path.abspath(self.directory))
+
+    def stats(self) -> Optional[Dict[str, int]]:
+        """The total cache ``hits`` and ``misses`` of the sccache server, which is
+        started if it isn't running; `None` if they can't be read.
+
+        The server is shared by all builds, so the stats of one build are the
+        difference between the stats before and after it."""
+        env_vars = os.environ.copy()
+        self.apply(env_vars)
+        try:
+            output = check_subprocess_output(
+                [self.executable, "--show-stats", "--stats-format=json"],
+                env=env_vars,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            stats = json.loads(output)["stats"]
+            return {
+                "hits": _count(stats["cache_hits"]),
+                "misses": _count(stats["cache_misses"]),
+            }
+        except (OSError, subprocess.CalledProcessError, ValueError, KeyError) as e:
+            logger.debug("could not read sccache stats: %s", e)
+            return None
+
+
+def _count(value: Any) -> int:
+    """Totals an sccache counter, which is either a number or counts per language.
+
+    >>> _count({"counts": {"Rust": 3, "C/C++": 1}, "adv_counts": {}})
+    4
+    >>> _count(2)
+    2
+    """
+    if isinstance(value, dict):
+        return sum(value.get("counts", {}).values())
+    return int(value)
+
+
+def find_compiler_cache(
+    setting: str, directory: Optional[str]
+) -> Optional[CompilerCache]:
+    """Resolves a ``compiler-cache`` setting (one of `COMPILER_CACHES`) to the
+    cache to use, if any."""
+    if setting not in COMPILER_CACHES:
+        raise SetupError(
+            f"compiler-cache must be one of {', '.join(COMPILER_CACHES)}, "
+            f"not {setting!r}"
+        )
+    if setting == "off":
+        return None
+    executable = shutil.which("sccache")
+    if executable is None:
+        if setting == "sccache":
+            raise SetupError("compiler-cache is 'sccache' but sccache was not found")
+        return None
+    return CompilerCache(executable, directory)
@@ -0,0 +1,125 @@
+"""Content fingerprints which let `build_rust` skip extensions which are up to date.
+
+A fingerprint records a digest of the build configuration, the content of every
+input file of the final artifact (as listed in cargo's dep-info file) and the
+paths the artifact was installed to. If none of these have changed, running
+cargo again would not produce anything new.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from ._cache import file_digest
+
+_FINGERPRINT_VERSION = 1
+
+# (size, mtime_ns, sha256) of an input file, or None if the file does not exist.
+FileEntry = Optional[List[Any]]
+
+
+def config_digest(config: Dict[str, Any]) -> str:
+    """Digest of a JSON-serializable build configuration.
+
+    >>> config_digest({"a": 1, "b": [2]}) == config_digest({"b": [2], "a": 1})
+    True
+    """
+    payload = json.dumps(config, sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def dep_info_sources(artifact: str) -> Optional[List[str]]:
+    """Reads the source files an artifact was built from out of the dep-info
+    (``.d``) file cargo writes alongside it.
+
+    Files from the cargo registry and git checkouts are left out, as their
+    content is pinned by ``Cargo.lock``.
+    """
+    dep_info = Path(artifact).with_suffix(".d")
+    try:
+        text = dep_info.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+    cargo_home = os.environ.get("CARGO_HOME", os.path.expanduser("~/.cargo"))
+    immutable = (
+        os.path.join(cargo_home, "registry") + os.sep,
+        os.path.join(cargo_home, "git") + os.sep,
+    )
+    return [
+        source
+        for source in _parse_dep_info(text)
+        if not os.path.abspath(source).startswith(immutable)
+    ]
+
+
+def _parse_dep_info(text: str) -> List[str]:
+    r"""Parses the dependencies of the first rule of a Makefile-style dep-info file.
+
+    >>> _parse_dep_info("/t/libfoo.so: /src/lib.rs /src/my\\ mod.rs\n\n/src/lib.rs:\n")
+    ['/src/lib.rs', '/src/my mod.rs']
+    >>> _parse_dep_info("C:\\t\\foo.dll: C:\\src\\lib.rs\n")
+    ['C:\\src\\lib.rs']
+    """
+    rule = text.replace("\\\n", " ").split("\n", 1)[0]
+    _, sep, deps = rule.partition(": ")
+    if not sep:
+        return []
+    return [dep.replace("\\ ", " ") for dep in re.findall(r"(?:\\ |\S)+", deps)]
+
+
+def fingerprint_is_fresh(path: Path, config: str) -> bool:
+    """Whether the fingerprint at `path` matches the current configuration,
+    input files, and installed outputs."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if record.get("version") != _FINGERPRINT_VERSION or record.get("config") != config:
+        return False
+    if not all(os.path.exists(p) for p in record["installed"]):
+        return False
+    return all(_unchanged(source, entry) for source, entry in record["inputs"].items())
+
+
+def write_fingerprint(
+    path: Path, config: str, inputs: Iterable[str], installed: Iterable[str]
+) -> None:
+    record = {
+        "version": _FINGERPRINT_VERSION,
+        "config": config,
+        "inputs": {source: file_entry(source) for source in sorted(set(inputs))},
+        "installed": sorted(set(installed)),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + "~")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(temp_path, path)
+
+
+def _unchanged(path: str, entry: FileEntry) -> bool:
+    current = file_entry(path, entry)
+    if current is None or entry is None:
+        return current is entry
+    return bool(current[2] == entry[2])
+
+
+def file_entry(path: str, previous: FileEntry = None) -> FileEntry:
+    """The size, modification time and content digest of the file at `path`.
+
+    The digest from the `previous` entry of the file is reused if its size and
+    modification time have not changed."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if previous is not None and previous[:2] == [stat.st_size, stat.st_mtime_ns]:
+        # Unchanged size and mtime; trust the previous content hash.
+        return previous
+    return [stat.st_size, stat.st_mtime_ns, file_digest(path)]
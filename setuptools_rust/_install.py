@@ -0,0 +1,229 @@
+"""Cheap ways of installing build artifacts: putting a copy next to the install
+location, not installing an artifact again when its content is unchanged, and
+syncing only the generated files which changed."""
+
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, List, Tuple
+
+from ._cache import file_digest
+from ._fingerprint import file_entry
+from ._utils import check_subprocess_output
+
+INSTALL_STRATEGIES = ("auto", "copy", "reflink", "hardlink")
+
+_RECORD_VERSION = 1
+
+# From linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+
+def place_file(source: str, dest: str, strategy: str, *, may_link: bool) -> str:
+    """Creates `dest` with the content of `source` as cheaply as `strategy` allows,
+    returning the method used: ``"reflink"``, ``"hardlink"`` or ``"copy"``.
+
+    `dest` must not be in use, as it may be overwritten in place; callers replace
+    the real destination with it afterwards. A hardlink is only made if
+    `may_link` is set, which callers must only do if nothing will modify `dest`.
+    """
+    # A leftover `dest` may be a hardlink to `source`, so must never be written to.
+    if os.path.lexists(dest):
+        os.unlink(dest)
+    if strategy in ("auto", "reflink") and _reflink(source, dest):
+        return "reflink"
+    # On Windows, a hardlink to an extension that is in use would stop cargo
+    # replacing its own artifact, so only link there when explicitly asked to.
+    if may_link and (
+        strategy == "hardlink" or (strategy == "auto" and sys.platform != "win32")
+    ):
+        try:
+            os.link(source, dest)
+            return "hardlink"
+        except OSError:
+            pass
+    _copy(source, dest)
+    return "copy"
+
+
+def _reflink(source: str, dest: str) -> bool:
+    """Clones `source` to `dest` sharing the same data blocks, on file systems with
+    copy-on-write support (Btrfs, XFS, ...)."""
+    if sys.platform != "linux":
+        return False
+    import fcntl
+
+    try:
+        with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return True
+    except OSError:
+        pass
+    try:
+        os.unlink(dest)
+    except OSError:
+        pass
+    return False
+
+
+def _copy(source: str, dest: str) -> None:
+    """Copies `source` to `dest`, in the kernel where possible."""
+    if sys.platform == "linux":
+        try:
+            with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+                # copy_file_range shares extents where the file system supports
+                # it (and copies server-side over NFS), but usually copies data.
+                copied, size = _copy_file_range(fsrc.fileno(), fdst.fileno())
+            if copied == size:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(source, dest)
+
+
+def _copy_file_range(src_fd: int, dest_fd: int) -> Tuple[int, int]:
+    size = os.fstat(src_fd).st_size
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(src_fd, dest_fd, size - copied)
+        if n == 0:
+            break
+        copied += n
+    return copied, size
+
+
+def install_is_current(record_path: Path, source: str, dest: str, options: Any) -> bool:
+    """Whether `dest` was installed, with the same `options`, from an artifact
+    with the same content as `source`, and has not been modified since.
+
+    `record_path` is the sidecar record written by `record_install`."""
+    try:
+        with open(record_path, encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if record.get("version") != _RECORD_VERSION or record.get("options") != options:
+        return False
+
+    previous = record["source"]
+    current = file_entry(source, previous)
+    if current is None or previous is None or current[2] != previous[2]:
+        return False
+    try:
+        stat = os.stat(dest)
+    except OSError:
+        return False
+    return bool(record["installed"] == [stat.st_size, stat.st_mtime_ns])
+
+
+def record_install(record_path: Path, source: str, dest: str, options: Any) -> None:
+    """Records that `dest` was installed from `source` with `options`.
+
+    The digest of `source` is taken as it was built, as `dest` may have been
+    modified (e.g. stripped) since."""
+    stat = os.stat(dest)
+    record = {
+        "version": _RECORD_VERSION,
+        "options": options,
+        "source": file_entry(source),
+        "installed": [stat.st_size, stat.st_mtime_ns],
+    }
+    record_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = record_path.with_name(record_path.name + "~")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(temp_path, record_path)
+
+
+def split_elf_debuginfo(path: str, debug_path: str) -> None:
+    """Moves the debug info of the ELF file at `path` to `debug_path`, leaving a
+    GNU debuglink to it in `path`, which is modified in place."""
+    objcopy = os.environ.get("OBJCOPY", "objcopy")
+    os.makedirs(os.path.dirname(debug_path), exist_ok=True)
+    check_subprocess_output([objcopy, "--only-keep-debug", path, debug_path], env=None)
+    check_subprocess_output(
+        [objcopy, "--strip-debug", f"--add-gnu-debuglink={debug_path}", path],
+        env=None,
+    )
+
+
+# Trees with more files than this are synced by a thread pool.
+_SYNC_PARALLEL_THRESHOLD = 64
+_SYNC_MAX_WORKERS = 8
+
+
+def sync_tree(source: Path, dest: Path) -> List[str]:
+    """Makes `dest` a copy of the file or directory `source`, copying only files
+    which differ. Returns the paths of all files in `dest` which came from
+    `source`.
+
+    Files are compared by size and modification time (which copies preserve),
+    then by content if only the modification time differs. Files in `dest`
+    which don't exist in `source` are left alone."""
+    if source.is_file():
+        _sync_file(source, dest)
+        return [str(dest)]
+
+    pairs = []
+    for dirpath, _, filenames in os.walk(source, followlinks=True):
+        dest_dir = dest / os.path.relpath(dirpath, source)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        pairs += [(Path(dirpath, name), dest_dir / name) for name in filenames]
+
+    if len(pairs) > _SYNC_PARALLEL_THRESHOLD:
+        workers = min(_SYNC_MAX_WORKERS, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # consume the results to raise any exception
+            list(executor.map(lambda pair: _sync_file(*pair), pairs))
+    else:
+        for pair in pairs:
+            _sync_file(*pair)
+    return [str(dest_file) for _, dest_file in pairs]
+
+
+def remove_stale_files(
+    previous: Iterable[str], current: Iterable[str], roots: Iterable[str]
+) -> None:
+    """Removes the files in `previous` which are not in `current`, along with any
+    directories which are left empty by their removal. Only files below one of
+    `roots` are removed."""
+    roots = [os.path.join(os.path.abspath(root), "") for root in roots]
+    for path in sorted(set(previous) - set(current)):
+        path = os.path.abspath(path)
+        if not path.startswith(tuple(roots)):
+            continue
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            continue
+        directory = os.path.dirname(path)
+        while any(os.path.join(directory, "").startswith(root) for root in roots):
+            if os.path.join(directory, "") in roots:
+                break
+            try:
+                os.rmdir(directory)
+            except OSError:
+                # not empty
+                break
+            directory = os.path.dirname(directory)
+
+
+def _sync_file(source: Path, dest: Path) -> bool:
+    """Copies `source` to `dest` unless they are identical; returns whether the
+    file was copied."""
+    try:
+        source_stat = source.stat()
+        dest_stat = dest.stat()
+    except FileNotFoundError:
+        pass
+    else:
+        if source_stat.st_size == dest_stat.st_size and (
+            source_stat.st_mtime_ns == dest_stat.st_mtime_ns
+            or file_digest(str(source)) == file_digest(str(dest))
+        ):
+            return False
+    shutil.copy2(source, dest)
+    return True
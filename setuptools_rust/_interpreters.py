@@ -0,0 +1,90 @@
+"""The Python interpreters to build extension modules for, with
+``build_rust --interpreters``."""
+
+import json
+import logging
+import re
+import shutil
+import subprocess
+from typing import List, NamedTuple
+
+from setuptools.errors import SetupError
+
+from ._utils import check_subprocess_output
+
+logger = logging.getLogger(__name__)
+
+_QUERY = (
+    "import json, platform, sys, sysconfig; print(json.dumps({"
+    "'executable': sys.executable, "
+    "'version': platform.python_version(), "
+    "'ext_suffix': sysconfig.get_config_var('EXT_SUFFIX')}))"
+)
+
+
+class Interpreter(NamedTuple):
+    """A Python interpreter, and the file name suffix of its extension modules."""
+
+    executable: str
+    version: str
+    ext_suffix: str
+
+
+def _executable_name(spec: str) -> str:
+    """The executable to look for on ``PATH`` for an interpreter given as a
+    version, which is otherwise the name or path of the executable itself.
+
+    >>> _executable_name("py3.11")
+    'python3.11'
+    >>> _executable_name("3.13t")
+    'python3.13t'
+    >>> _executable_name("pypy3.10")
+    'pypy3.10'
+    >>> _executable_name("/opt/python/bin/python3")
+    '/opt/python/bin/python3'
+    """
+    match = re.fullmatch(r"(?:py)?(\d+\.\d+t?)", spec)
+    if match:
+        return f"python{match.group(1)}"
+    return spec
+
+
+def find_interpreter(spec: str) -> Interpreter:
+    """Finds the interpreter for `spec`, a version such as ``py3.11`` or ``3.11``
+    or an executable, and asks it for its extension module suffix."""
+    executable = shutil.which(_executable_name(spec))
+    if executable is None:
+        raise SetupError(f"can't find Python interpreter {spec!r}")
+    try:
+        output = check_subprocess_output(
+            [executable, "-c", _QUERY], env=None, stderr=subprocess.PIPE, text=True
+        )
+        info = json.loads(output)
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        raise SetupError(f"can't query Python interpreter {spec!r}: {e}") from e
+    if not info["ext_suffix"]:
+        raise SetupError(f"Python interpreter {spec!r} has no extension module suffix")
+    return Interpreter(info["executable"], info["version"], info["ext_suffix"])
+
+
+def find_interpreters(value: str) -> List[Interpreter]:
+    """Finds the interpreters in the comma-separated list `value`.
+
+    Interpreters with the same extension module suffix as an earlier one load
+    the same modules, so are left out."""
+    interpreters: List[Interpreter] = []
+    for spec in (spec.strip() for spec in value.split(",")):
+        if not spec:
+            continue
+        interpreter = find_interpreter(spec)
+        if any(i.ext_suffix == interpreter.ext_suffix for i in interpreters):
+            logger.info(
+                "skipping Python interpreter %s, which has the same ABI as "
+                "an earlier one",
+                interpreter.executable,
+            )
+            continue
+        interpreters.append(interpreter)
+    if not interpreters:
+        raise SetupError("interpreters must list at least one Python interpreter")
+    return interpreters
@@ -0,0 +1,92 @@
+"""pyo3 build configuration files for the running interpreter, which spare
+pyo3-build-config from running the interpreter to discover its configuration."""
+
+import os
+import platform
+import struct
+import sys
+import sysconfig
+import threading
+from typing import Optional
+
+from ._cache import cache_dir, cache_enabled, key_digest
+
+# The sysconfig variables pyo3 reads as build flags when they are set to 1.
+_BUILD_FLAGS = ("Py_DEBUG", "Py_REF_DEBUG", "Py_TRACE_REFS", "COUNT_ALLOCS")
+
+
+def pyo3_config(executable: str, abi3: bool) -> Optional[str]:
+    """The content of a ``PYO3_CONFIG_FILE`` for the running interpreter, run as
+    `executable`, or `None` if pyo3 should find the configuration itself.
+
+    Only CPython and PyPy outside Windows are described, where the library
+    name and directory follow from ``sysconfig`` as pyo3 derives them."""
+    implementation = platform.python_implementation()
+    if implementation not in ("CPython", "PyPy") or sys.platform == "win32":
+        return None
+    ld_version = sysconfig.get_config_var("LDVERSION")
+    if not ld_version:
+        return None
+    if implementation == "PyPy":
+        lib_name = f"pypy{ld_version}-c"
+    else:
+        lib_name = f"python{ld_version}"
+
+    shared = (
+        implementation == "PyPy"
+        or bool(sysconfig.get_config_var("Py_ENABLE_SHARED"))
+        or bool(sysconfig.get_config_var("PYTHONFRAMEWORK"))
+    )
+    build_flags = [flag for flag in _BUILD_FLAGS if sysconfig.get_config_var(flag) == 1]
+    # Only known to (and only needed by) pyo3 versions supporting free-threading.
+    if sysconfig.get_config_var("Py_GIL_DISABLED") == 1:
+        build_flags.append("Py_GIL_DISABLED")
+
+    lines = [
+        f"implementation={implementation}",
+        f"version={sys.version_info[0]}.{sys.version_info[1]}",
+        f"shared={str(shared).lower()}",
+        f"abi3={str(abi3).lower()}",
+        f"lib_name={lib_name}",
+    ]
+    lib_dir = sysconfig.get_config_var("LIBDIR")
+    if lib_dir:
+        lines.append(f"lib_dir={lib_dir}")
+    lines += [
+        f"executable={executable}",
+        f"pointer_width={struct.calcsize('P') * 8}",
+        f"build_flags={','.join(build_flags)}",
+        "suppress_build_script_link_lines=false",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def pyo3_config_file(content: str) -> Optional[str]:
+    """Writes a pyo3 config file with `content`, returning its absolute path, or
+    `None` if the file can't be written or ``SETUPTOOLS_RUST_PYO3_CONFIG`` is
+    disabled.
+
+    The file is named after its content, in the cache directory, so every build
+    with the same configuration reuses the same file, unmodified, and cargo's
+    fingerprint of pyo3 stays fresh."""
+    if not cache_enabled("SETUPTOOLS_RUST_PYO3_CONFIG"):
+        return None
+    directory = cache_dir() / "pyo3-config"
+    path = directory / f"{key_digest(content)[:32]}.txt"
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return str(path.absolute())
+    except OSError:
+        pass
+    temp_path = directory / f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        temp_path.write_text(content, encoding="utf-8")
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        return None
+    return str(path.absolute())
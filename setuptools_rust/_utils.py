@@ -35,6 +35,16 @@ def run_subprocess(
     return subprocess.run(*args, **kwargs)  # noqa: TID251 # this is a wrapper to implement the rule
 
 
+def popen_subprocess(
+    *args: Any, env: Union[Env, dict[str, str], None], **kwargs: Any
+) -> subprocess.Popen:
+    """Wrapper around subprocess.Popen that requires a decision to pass env."""
+    if isinstance(env, Env):
+        env = env.env
+    kwargs["env"] = env
+    return subprocess.Popen(*args, **kwargs)
+
+
 def check_subprocess_output(
     *args: Any, env: Union[Env, dict[str, str], None], **kwargs: Any
 ) -> str:
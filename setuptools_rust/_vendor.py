@@ -0,0 +1,451 @@
+"""Trimming and caching the crates vendored into sdists by
+``sdist --vendor-crates``."""
+
+import collections
+import json
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from setuptools.errors import SetupError
+
+from ._cache import cache_dir, cache_enabled, file_digest, key_digest
+from ._install import place_file
+from ._utils import Env, check_subprocess_output
+from .rustc_info import get_cargo_version
+from .setuptools_ext import _load_toml
+
+VENDOR_FORMATS = ("directory", "local-registry")
+
+# Number of sets of vendored crates kept in the vendor cache.
+_VENDOR_CACHE_ENTRIES = 8
+
+_CRATES_IO_SOURCES = (
+    "registry+https://github.com/rust-lang/crates.io-index",
+    "sparse+https://index.crates.io/",
+)
+
+# Files which cargo may take as the root of a target without it being declared.
+_TARGET_ROOT_PATTERNS = (
+    "build.rs",
+    "src/lib.rs",
+    "src/main.rs",
+    "src/bin/*.rs",
+    "src/bin/*/main.rs",
+    "examples/*.rs",
+    "examples/*/main.rs",
+    "tests/*.rs",
+    "tests/*/main.rs",
+    "benches/*.rs",
+    "benches/*/main.rs",
+)
+_TARGET_KINDS = ("bin", "example", "test", "bench")
+
+
+def vendor_platforms(value: str) -> List[str]:
+    """Parses the comma-separated target triples of ``--vendor-platforms``.
+
+    >>> vendor_platforms("x86_64-unknown-linux-gnu, aarch64-unknown-linux-gnu")
+    ['x86_64-unknown-linux-gnu', 'aarch64-unknown-linux-gnu']
+    """
+    platforms = [triple.strip() for triple in value.split(",") if triple.strip()]
+    if not platforms:
+        raise SetupError("vendor-platforms must list at least one target triple")
+    return platforms
+
+
+def platform_packages(
+    manifest_paths: Iterable[str],
+    platforms: Iterable[str],
+    cargo_manifest_args: Iterable[str],
+    env: Optional[Env],
+) -> Set[Tuple[str, str]]:
+    """The name and version of every package which the crates at
+    `manifest_paths` depend on when built for any of `platforms`."""
+    packages: Set[Tuple[str, str]] = set()
+    for manifest_path in manifest_paths:
+        for platform in platforms:
+            output = check_subprocess_output(
+                [
+                    "cargo",
+                    "metadata",
+                    "--format-version",
+                    "1",
+                    "--manifest-path",
+                    manifest_path,
+                    "--filter-platform",
+                    platform,
+                    *cargo_manifest_args,
+                ],
+                env=env,
+                text=True,
+            )
+            metadata = json.loads(output)
+            packages.update(
+                (package["name"], package["version"])
+                for package in metadata["packages"]
+            )
+    return packages
+
+
+def prune_vendored_crates(vendor_dir: Path, keep: Set[Tuple[str, str]]) -> List[str]:
+    """Replaces each crate in `vendor_dir` whose name and version are not in
+    `keep` with a stub, returning the directory names of the crates replaced.
+
+    A stub keeps the crate's ``Cargo.toml``, so that cargo can still resolve the
+    dependency graph, features included, along with empty files for the roots
+    of its targets. Everything else is removed, and ``.cargo-checksum.json`` is
+    rewritten to list the remaining files, keeping the checksum of the package
+    which ``Cargo.lock`` records."""
+    if not vendor_dir.is_dir():
+        # cargo vendor creates no directory when there is nothing to vendor
+        return []
+    pruned = []
+    for crate_dir in sorted(vendor_dir.iterdir()):
+        manifest_path = crate_dir / "Cargo.toml"
+        if not manifest_path.is_file():
+            continue
+        manifest = _load_toml(manifest_path.read_bytes())
+        package = manifest.get("package", {})
+        if (package.get("name"), package.get("version")) in keep:
+            continue
+        _stub_crate(crate_dir, manifest)
+        pruned.append(crate_dir.name)
+    return pruned
+
+
+def _stub_crate(crate_dir: Path, manifest: dict) -> None:
+    checksum_path = crate_dir / ".cargo-checksum.json"
+    with open(checksum_path, encoding="utf-8") as f:
+        checksums = json.load(f)
+
+    roots = _target_roots(crate_dir, manifest)
+    files = {}
+    for dirpath, _, filenames in os.walk(crate_dir):
+        for filename in filenames:
+            path = Path(dirpath, filename)
+            relative = path.relative_to(crate_dir).as_posix()
+            if path == checksum_path:
+                continue
+            if relative == "Cargo.toml":
+                pass
+            elif relative in roots:
+                path.write_bytes(b"")
+            else:
+                path.unlink()
+                continue
+            files[relative] = file_digest(str(path))
+    _remove_empty_dirs(crate_dir)
+
+    checksums["files"] = files
+    with open(checksum_path, "w", encoding="utf-8") as f:
+        json.dump(checksums, f)
+
+
+def _target_roots(crate_dir: Path, manifest: dict) -> Set[str]:
+    """The relative paths of the files which are, or may be, target roots of the
+    crate in `crate_dir`."""
+    roots = {
+        path.relative_to(crate_dir).as_posix()
+        for pattern in _TARGET_ROOT_PATTERNS
+        for path in crate_dir.glob(pattern)
+    }
+    build = manifest.get("package", {}).get("build")
+    if isinstance(build, str):
+        roots.add(build)
+    lib_path = manifest.get("lib", {}).get("path")
+    if lib_path:
+        roots.add(lib_path)
+    for kind in _TARGET_KINDS:
+        for target in manifest.get(kind, []):
+            if target.get("path"):
+                roots.add(target["path"])
+    return {Path(root).as_posix() for root in roots}
+
+
+def _remove_empty_dirs(directory: Path) -> None:
+    for dirpath, _, _ in sorted(os.walk(directory), reverse=True):
+        if dirpath != str(directory):
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                # not empty
+                pass
+
+
+def vendor_cache_key(
+    manifest_paths: Iterable[str],
+    cargo_manifest_args: Iterable[str],
+    platforms: Optional[List[str]],
+    env: Optional[Env],
+    vendor_format: str = "directory",
+) -> Optional[str]:
+    """The key of the crates vendored for `manifest_paths` in the vendor cache,
+    or `None` if the cache is disabled by ``SETUPTOOLS_RUST_VENDOR_CACHE`` or a
+    manifest has no ``Cargo.lock`` yet.
+
+    The lockfiles pin every vendored crate, so they key the cache along with the
+    manifests vendored for and the options and cargo version vendoring with."""
+    if not cache_enabled("SETUPTOOLS_RUST_VENDOR_CACHE"):
+        return None
+    manifest_paths = list(manifest_paths)
+    cargo_manifest_args = list(cargo_manifest_args)
+    lockfiles = set()
+    for manifest_path in manifest_paths:
+        lockfile = _find_lockfile(manifest_path, cargo_manifest_args, env)
+        if lockfile is None:
+            return None
+        lockfiles.add(str(lockfile))
+    return key_digest(
+        sorted({Path(path).as_posix() for path in manifest_paths}),
+        sorted(file_digest(lockfile) for lockfile in lockfiles),
+        cargo_manifest_args,
+        platforms,
+        vendor_format,
+        get_cargo_version("cargo", env or Env(None)),
+    )
+
+
+def _find_lockfile(
+    manifest_path: str, cargo_manifest_args: List[str], env: Optional[Env]
+) -> Optional[Path]:
+    """The ``Cargo.lock`` of the workspace of `manifest_path`, which is next to
+    the workspace root manifest, or `None` if there is none yet.
+
+    The workspace root is asked of cargo, as a lockfile in any other directory
+    above the manifest belongs to an unrelated project."""
+    try:
+        output = check_subprocess_output(
+            [
+                "cargo",
+                "metadata",
+                "--format-version",
+                "1",
+                "--no-deps",
+                "--manifest-path",
+                manifest_path,
+                *cargo_manifest_args,
+            ],
+            env=env,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        workspace_root = json.loads(output)["workspace_root"]
+    except (OSError, subprocess.CalledProcessError, ValueError, KeyError):
+        return None
+    lockfile = Path(workspace_root) / "Cargo.lock"
+    return lockfile if lockfile.is_file() else None
+
+
+def restore_vendor_cache(key: str, vendor_dir: Path) -> bool:
+    """Populates `vendor_dir` from the vendor cache entry `key`, returning
+    whether there was one. Files are reflinked or hardlinked where possible."""
+    entry = cache_dir() / "vendor" / key
+    if not entry.is_dir():
+        return False
+    try:
+        # Record the access for least-recently-used eviction.
+        os.utime(entry)
+        _link_tree(entry, vendor_dir)
+    except OSError:
+        shutil.rmtree(vendor_dir, ignore_errors=True)
+        return False
+    return True
+
+
+def store_vendor_cache(key: str, vendor_dir: Path) -> None:
+    """Adds the crates vendored in `vendor_dir` to the vendor cache as `key`."""
+    directory = cache_dir() / "vendor"
+    entry = directory / key
+    if entry.exists():
+        return
+    temp_entry = directory / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        _link_tree(vendor_dir, temp_entry)
+        os.rename(temp_entry, entry)
+    except OSError:
+        # another build may have stored the same entry first
+        shutil.rmtree(temp_entry, ignore_errors=True)
+        return
+    _evict_vendor_cache(directory)
+
+
+def _link_tree(source: Path, dest: Path) -> None:
+    for dirpath, _, filenames in os.walk(source):
+        dest_dir = dest / os.path.relpath(dirpath, source)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        for filename in filenames:
+            # neither the cache nor the sdist's staging tree is modified in place
+            place_file(
+                os.path.join(dirpath, filename),
+                str(dest_dir / filename),
+                "auto",
+                may_link=True,
+            )
+
+
+def _evict_vendor_cache(directory: Path) -> None:
+    try:
+        entries = [
+            (entry.stat().st_mtime_ns, entry.path)
+            for entry in os.scandir(directory)
+            if entry.is_dir() and not entry.name.endswith(".tmp")
+        ]
+    except OSError:
+        return
+    # Newest first; the entry just stored is kept.
+    for _, path in sorted(entries, reverse=True)[_VENDOR_CACHE_ENTRIES:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def vendor_local_registry(
+    registry_dir: Path,
+    manifest_paths: Iterable[str],
+    cargo_manifest_args: Iterable[str],
+    platforms: Optional[List[str]],
+    env: Optional[Env],
+) -> None:
+    """Vendors the crates.io dependencies of the crates at `manifest_paths` into
+    `registry_dir` as a Cargo local registry: the ``.crate`` archives which cargo
+    downloaded, and an index describing them.
+
+    If `platforms` are given, only the archives of crates needed on them are
+    included; the index still lists every crate in the lockfiles, with their
+    checksums, so that cargo can resolve them all.
+
+    Raises `SetupError` if a dependency comes from git or another registry,
+    which the local registry can't replace."""
+    manifest_paths = list(manifest_paths)
+    cargo_manifest_args = list(cargo_manifest_args)
+    packages: Dict[str, Any] = {}
+    for manifest_path in manifest_paths:
+        manifest_args = ["--manifest-path", manifest_path, *cargo_manifest_args]
+        check_subprocess_output(["cargo", "fetch", *manifest_args], env=env)
+        output = check_subprocess_output(
+            ["cargo", "metadata", "--format-version", "1", *manifest_args],
+            env=env,
+            text=True,
+        )
+        for package in json.loads(output)["packages"]:
+            packages[package["id"]] = package
+
+    # Path dependencies have no source, and are part of the sdist already.
+    unsupported = sorted(
+        f"{package['name']} {package['version']} ({package['source']})"
+        for package in packages.values()
+        if package["source"] is not None and package["source"] not in _CRATES_IO_SOURCES
+    )
+    if unsupported:
+        raise SetupError(
+            "can't vendor dependencies which are not from crates.io into a local "
+            f"registry, use vendor-format=directory instead: {', '.join(unsupported)}"
+        )
+
+    keep = None
+    if platforms is not None:
+        keep = platform_packages(manifest_paths, platforms, cargo_manifest_args, env)
+
+    cache = _cargo_home(env) / "registry" / "cache"
+    index: Dict[str, List[str]] = collections.defaultdict(list)
+    registry_dir.mkdir(parents=True, exist_ok=True)
+    for package in sorted(packages.values(), key=lambda p: (p["name"], p["version"])):
+        name, version = package["name"], package["version"]
+        if package["source"] is None:
+            continue
+        archive = _find_crate_archive(cache, name, version)
+        index[_index_path(name)].append(
+            json.dumps(_index_entry(package, file_digest(str(archive))))
+        )
+        if keep is None or (name, version) in keep:
+            # cargo never modifies its downloaded archives
+            place_file(
+                str(archive),
+                str(registry_dir / archive.name),
+                "auto",
+                may_link=True,
+            )
+
+    for index_path, lines in index.items():
+        path = registry_dir / "index" / index_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+
+def _cargo_home(env: Optional[Env]) -> Path:
+    env_vars = (env.env if env is not None else None) or os.environ
+    return Path(env_vars.get("CARGO_HOME") or os.path.expanduser("~/.cargo"))
+
+
+def _find_crate_archive(cache: Path, name: str, version: str) -> Path:
+    """The ``.crate`` archive of a crates.io package, as downloaded by cargo
+    into `cache`, which has a directory for each registry index."""
+    for archive in sorted(cache.glob(f"*/{name}-{version}.crate")):
+        return archive
+    raise SetupError(f"can't find the downloaded archive of {name} {version}")
+
+
+def _index_path(name: str) -> str:
+    """The path of the index file of crate `name` within a registry index.
+
+    >>> _index_path("a")
+    '1/a'
+    >>> _index_path("syn")
+    '3/s/syn'
+    >>> _index_path("Serde")
+    'se/rd/serde'
+    """
+    name = name.lower()
+    if len(name) <= 2:
+        return f"{len(name)}/{name}"
+    if len(name) == 3:
+        return f"3/{name[0]}/{name}"
+    return f"{name[:2]}/{name[2:4]}/{name}"
+
+
+def _index_entry(package: Dict[str, Any], checksum: str) -> Dict[str, Any]:
+    """The registry index entry of a package, from its ``cargo metadata``."""
+    features: Dict[str, List[str]] = {}
+    features2: Dict[str, List[str]] = {}
+    for feature, values in package["features"].items():
+        # As crates.io does, features only newer cargo understands go separately.
+        if any(value.startswith("dep:") or "?/" in value for value in values):
+            features2[feature] = values
+        else:
+            features[feature] = values
+    entry: Dict[str, Any] = {
+        "name": package["name"],
+        "vers": package["version"],
+        "deps": [_index_dependency(dep) for dep in package["dependencies"]],
+        "cksum": checksum,
+        "features": features,
+        "yanked": False,
+    }
+    if features2:
+        entry["features2"] = features2
+        entry["v"] = 2
+    if package.get("links"):
+        entry["links"] = package["links"]
+    if package.get("rust_version"):
+        entry["rust_version"] = package["rust_version"]
+    return entry
+
+
+def _index_dependency(dep: Dict[str, Any]) -> Dict[str, Any]:
+    entry = {
+        "name": dep.get("rename") or dep["name"],
+        "req": dep["req"],
+        "features": dep["features"],
+        "optional": dep["optional"],
+        "default_features": dep["uses_default_features"],
+        "target": dep["target"],
+        "kind": dep["kind"] or "normal",
+    }
+    if dep.get("rename"):
+        entry["package"] = dep["name"]
+    if dep.get("registry"):
+        entry["registry"] = dep["registry"]
+    return entry
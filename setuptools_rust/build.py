@@ -1,26 +1,51 @@
 from __future__ import annotations
 
 import collections
+import contextlib
 import enum
+import functools
+import io
+import itertools
 import json
 import os
 import platform
+import re
 import shutil
 import subprocess
 import sys
 import sysconfig
 import logging
+import tempfile
+import threading
+import time
 import warnings
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from setuptools.errors import (
     CompileError,
     ExecError,
     FileError,
     InternalError,
     PlatformError,
+    SetupError,
 )
 from sysconfig import get_config_var
 from pathlib import Path
-from typing import Dict, List, Literal, NamedTuple, Optional, Set, Tuple, Union, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    Union,
+    cast,
+)
 
 from setuptools import Distribution
 from setuptools.command.build_ext import build_ext as CommandBuildExt
@@ -28,14 +53,51 @@ from setuptools.command.build_ext import get_abi3_suffix
 from setuptools.command.build_py import build_py as setuptools_build_py
 from setuptools.command.install_scripts import install_scripts as CommandInstallScripts
 
-from ._utils import check_subprocess_output, format_called_process_error, Env
+from ._cache import cargo_config_paths, file_lock, key_digest, target_cache_root
+from ._compiler_cache import CompilerCache, find_compiler_cache
+from ._cargo_messages import CargoMessageIndex, html_unit_timings, unit_timings
+from ._interpreters import Interpreter, find_interpreters
+from ._pyo3_config import pyo3_config, pyo3_config_file
+from ._install import (
+    INSTALL_STRATEGIES,
+    install_is_current,
+    place_file,
+    record_install,
+    remove_stale_files,
+    split_elf_debuginfo,
+    sync_tree,
+)
+from ._fingerprint import (
+    config_digest,
+    dep_info_sources,
+    fingerprint_is_fresh,
+    write_fingerprint,
+)
+from ._utils import (
+    check_subprocess_output,
+    format_called_process_error,
+    popen_subprocess,
+    Env,
+)
 from .command import RustCommand
-from .extension import Binding, RustBin, RustExtension, Strip
+from .events import (
+    ChromeTraceSink,
+    EventDispatcher,
+    EventKind,
+    EventSink,
+    JsonLinesSink,
+    ProgressReporter,
+)
+from .extension import Binding, CargoMetadata, RustBin, RustExtension, Strip
 from .rustc_info import (
-    get_rust_host,
+    ToolchainInfo,
     get_rust_version,
-    get_rustc_cfgs,
+    probe_toolchain,
 )
+from .version import version as __version__
+
+if TYPE_CHECKING:
+    from semantic_version import Version
 
 logger = logging.getLogger(__name__)
 
@@ -49,8 +111,8 @@ except ImportError:  # old version of setuptools
         from setuptools import Command as CommandBdistWheel  # type: ignore[assignment]
 
 
-def _check_cargo_supports_crate_type_option(env: Optional[Env]) -> bool:
-    version = get_rust_version(env)
+def _check_cargo_supports_crate_type_option(toolchain: ToolchainInfo) -> bool:
+    version = toolchain.version
 
     if version is None:
         return False
@@ -58,8 +120,36 @@ def _check_cargo_supports_crate_type_option(env: Optional[Env]) -> bool:
     return version.major > 1 or (version.major == 1 and version.minor >= 64)  # type: ignore
 
 
+def _supports_link_time_strip(toolchain: ToolchainInfo) -> bool:
+    # The `strip` profile setting was stabilized in Rust 1.59.
+    version = toolchain.version
+
+    if version is None:
+        return False
+
+    return version.major > 1 or (version.major == 1 and version.minor >= 59)  # type: ignore
+
+
 _UNIVERSAL2_TARGETS = ("aarch64-apple-darwin", "x86_64-apple-darwin")
 
+_CARGO_TIMINGS_FORMATS = ("html", "json")
+
+# How many of the slowest crates to list after a build with cargo timings.
+_CARGO_TIMINGS_SUMMARY_LENGTH = 10
+
+# The preflight queries are subprocesses, so mostly spend their time waiting.
+_MAX_PREFLIGHT_WORKERS = 16
+
+# Environment variables which are part of an extension's fingerprint.
+_FINGERPRINT_ENV_PREFIXES = (
+    "CARGO",
+    "RUST",
+    "PYO3_",
+    "PYTHON_SYS_",
+    "MACOSX_",
+    "ARCHFLAGS",
+)
+
 
 class build_rust(RustCommand):
     """Command for building Rust crates via cargo."""
@@ -82,21 +172,131 @@ class build_rust(RustCommand):
             "directory for temporary files (cargo 'target' directory) ",
         ),
         ("target=", None, "Build for the target triple"),
+        (
+            "parallel=",
+            "j",
+            "number of Rust extensions to build in parallel "
+            + "(defaults to the build_ext setting)",
+        ),
+        (
+            "batch-workspaces",
+            None,
+            "build extensions from the same Cargo workspace with one cargo invocation",
+        ),
+        (
+            "skip-unchanged",
+            None,
+            "skip building extensions whose inputs and installed artifacts are unchanged",
+        ),
+        (
+            "progress",
+            None,
+            "print a progress line counting built crates and extensions",
+        ),
+        (
+            "cargo-timings=",
+            None,
+            "pass --timings to cargo with these report formats "
+            + "('html', 'json' or 'html,json') and collect the reports",
+        ),
+        (
+            "cargo-timings-dir=",
+            None,
+            "directory to collect cargo's timing reports into "
+            + "(default: 'cargo-timings' in the build directory)",
+        ),
+        (
+            "timings-report=",
+            None,
+            "write a Chrome trace-event JSON report of the time spent in each "
+            + "step of the build to this file",
+        ),
+        (
+            "split-debug-dir=",
+            None,
+            "directory to collect the debug info of Strip.Split extensions into "
+            + "(default: 'debug' in the build directory)",
+        ),
+        (
+            "compiler-cache=",
+            None,
+            "cache rustc invocations: 'auto' (use sccache if found), 'sccache' "
+            + "or 'off' (default)",
+        ),
+        (
+            "compiler-cache-dir=",
+            None,
+            "directory for the compiler cache (default: sccache's own setting)",
+        ),
+        (
+            "target-cache=",
+            None,
+            "keep a persistent cargo target directory for each project in this "
+            + "directory ('true' for the user cache directory)",
+        ),
+        (
+            "interpreters=",
+            None,
+            "comma-separated Python interpreters to build extension modules for, "
+            + "as versions ('3.11' or 'py3.11') or executables "
+            + "(default: the running interpreter)",
+        ),
+        (
+            "install-strategy=",
+            None,
+            "how to install built artifacts: "
+            + "'auto' (default: reflink, else hardlink, else copy), "
+            + "'reflink', 'hardlink' or 'copy'",
+        ),
+    ]
+    boolean_options = [
+        "inplace",
+        "debug",
+        "release",
+        "qbuild",
+        "batch-workspaces",
+        "skip-unchanged",
+        "progress",
     ]
-    boolean_options = ["inplace", "debug", "release", "qbuild"]
 
     inplace: bool = False
     debug: bool = False
     release: bool = False
     qbuild: bool = False
+    batch_workspaces: bool = False
+    skip_unchanged: bool = False
+    progress: bool = False
 
     plat_name: Optional[str] = None
     build_temp: Optional[str] = None
+    parallel: Union[int, bool, str, None] = None
+    install_strategy: str = "auto"
+    split_debug_dir: Optional[str] = None
+    timings_report: Optional[str] = None
+    cargo_timings: Optional[str] = None
+    cargo_timings_dir: Optional[str] = None
+    compiler_cache: str = "off"
+    compiler_cache_dir: Optional[str] = None
+    target_cache: Union[str, bool, None] = None
+    interpreters: Optional[str] = None
 
     def initialize_options(self) -> None:
         super().initialize_options()
         self.target = os.getenv("CARGO_BUILD_TARGET", _Platform.CARGO_DEFAULT)
         self.cargo = os.getenv("CARGO", "cargo")
+        self._cargo_processes = _CargoProcesses()
+        self._events = EventDispatcher()
+        self._cargo_runs = itertools.count()
+        # (duration, unit name) of each crate in the collected cargo timings
+        self._crate_timings: List[Tuple[float, str]] = []
+        self._cargo_timing_reports: List[str] = []
+        self._cargo_timings_locks: Dict[str, threading.Lock] = {}
+        self._cargo_timings_locks_guard = threading.Lock()
+        self._compiler_cache: Optional[CompilerCache] = None
+        self._target_cache_root: Optional[Path] = None
+        self._interpreters: List[Interpreter] = []
+        # the interpreter being built for, if not the running one
+        self._interpreter: Optional[Interpreter] = None
 
     def finalize_options(self) -> None:
         super().finalize_options()
@@ -114,30 +314,466 @@ class build_rust(RustCommand):
             ("build_temp", "build_temp"),
             ("debug", "debug"),
             ("inplace", "inplace"),
+            ("parallel", "parallel"),
         )
 
+        if isinstance(self.parallel, str):
+            try:
+                self.parallel = int(self.parallel)
+            except ValueError:
+                raise SetupError("parallel should be an integer")
+
+        if self.split_debug_dir is None:
+            build = self.get_finalized_command("build")
+            self.split_debug_dir = os.path.join(build.build_base, "debug")
+
+        if self.cargo_timings is not None:
+            _cargo_timings_formats(self.cargo_timings)
+        if self.cargo_timings_dir is None:
+            build = self.get_finalized_command("build")
+            self.cargo_timings_dir = os.path.join(build.build_base, "cargo-timings")
+
+        self._compiler_cache = find_compiler_cache(
+            self.compiler_cache, self.compiler_cache_dir
+        )
+
+        if self.target_cache is None:
+            self.target_cache = os.getenv("SETUPTOOLS_RUST_TARGET_CACHE")
+        self._target_cache_root = target_cache_root(self.target_cache)
+
+        if self.interpreters:
+            self._interpreters = find_interpreters(self.interpreters)
+
+        if self.install_strategy not in INSTALL_STRATEGIES:
+            raise SetupError(
+                f"install-strategy must be one of {', '.join(INSTALL_STRATEGIES)}, "
+                f"not {self.install_strategy!r}"
+            )
+
         if self.build_temp is not None:
             warnings.warn(
                 "`--build-temp` argument does nothing for Rust extensions, set `CARGO_TARGET_DIR` instead.",
                 DeprecationWarning,
             )
 
+        if self.progress:
+            self.add_event_sink(ProgressReporter())
+        events_file = os.getenv("SETUPTOOLS_RUST_EVENTS_FILE")
+        if events_file:
+            self.add_event_sink(JsonLinesSink(events_file))
+        if self.timings_report is None:
+            self.timings_report = os.getenv("SETUPTOOLS_RUST_TIMINGS_REPORT") or None
+        if self.timings_report:
+            self.add_event_sink(ChromeTraceSink(self.timings_report))
+
+    def add_event_sink(self, sink: EventSink) -> None:
+        """Register a callable to receive a :class:`~setuptools_rust.events.BuildEvent`
+        for each step of the build.
+
+        Events may be sent from several threads, but never concurrently."""
+        self._events.add_sink(sink)
+
+    @contextlib.contextmanager
+    def _timed(
+        self, kind: EventKind, ext: Optional[RustExtension] = None, **data: Any
+    ) -> Iterator[Dict[str, Any]]:
+        """Emits an event of `kind` covering the time spent in the block, if it
+        succeeds. The block may add to the event's `data`."""
+        start = time.time()
+        yield data
+        self._events.emit(
+            kind,
+            None if ext is None else ext.name,
+            timestamp=start,
+            duration=time.time() - start,
+            **data,
+        )
+
     def run_for_extension(self, ext: RustExtension) -> None:
+        self._resolve_target(ext)
+        if self._is_unchanged(ext):
+            return
+        dylib_paths, artifact_dir = self.build_extension(ext)
+        self.install_extension(ext, dylib_paths, artifact_dir)
+
+    def _resolve_target(self, ext: RustExtension) -> None:
         assert self.plat_name is not None
         if self.target is _Platform.CARGO_DEFAULT:
             self.target = _override_cargo_default_target(self.plat_name, ext.env)
-        dylib_paths, artifact_dir = self.build_extension(ext)
-        self.install_extension(ext, dylib_paths, artifact_dir)
 
-    def build_extension(
-        self, ext: RustExtension
-    ) -> Tuple[List["_BuiltModule"], Optional[Path]]:
+    def _preflight(self) -> None:
+        """Run the toolchain probes and ``cargo metadata`` for all extensions
+        concurrently, so their (cached) results are ready before the first build.
+
+        None of these queries depend on each other. Failures are ignored here:
+        the build makes the same queries again later, and reports any error
+        with its usual handling."""
+        probes: List[Tuple[EventKind, Optional[RustExtension], Callable[[], object]]]
+        probes = [
+            (
+                EventKind.PROBE,
+                None,
+                functools.partial(get_rust_version, self._version_env()),
+            )
+        ]
+        for env in dict.fromkeys(ext.env for ext in self.extensions):
+            probes.append(
+                (
+                    EventKind.PROBE,
+                    None,
+                    functools.partial(self._preflight_toolchain, env),
+                )
+            )
+        for ext in self.extensions:
+            if os.path.exists(ext.path):
+                quiet = self.qbuild or ext.quiet
+                probes.append(
+                    (
+                        EventKind.METADATA,
+                        ext,
+                        functools.partial(ext.metadata, quiet=quiet),
+                    )
+                )
+
+        workers = min(len(probes), _MAX_PREFLIGHT_WORKERS)
+        with self._timed(EventKind.PREFLIGHT):
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [
+                    executor.submit(self._preflight_probe, *probe) for probe in probes
+                ]:
+                    future.result()
+
+    def _preflight_probe(
+        self,
+        kind: EventKind,
+        ext: Optional[RustExtension],
+        probe: Callable[[], object],
+    ) -> None:
+        """Runs one preflight query, timed as an event of `kind` recording any
+        error instead of raising it."""
+        with self._timed(kind, ext) as data:
+            try:
+                probe()
+            except Exception as e:
+                data["error"] = str(e)
+
+    def _preflight_toolchain(self, env: Env) -> ToolchainInfo:
+        target: Union[str, _Platform, None] = self.target
+        if target is _Platform.CARGO_DEFAULT:
+            assert self.plat_name is not None
+            target = _override_cargo_default_target(self.plat_name, env)
+        return probe_toolchain(target if isinstance(target, str) else None, env)
+
+    def _toolchain(self, ext: RustExtension) -> ToolchainInfo:
+        """Probe the toolchain used to build `ext` for the resolved target."""
+        # A universal2 build has no single target triple; its cfgs are unused.
+        target_triple = self.target if isinstance(self.target, str) else None
+        return probe_toolchain(target_triple, ext.env)
+
+    def _parallel_workers(self) -> int:
+        if self.parallel is True:
+            return os.cpu_count() or 1
+        return max(int(self.parallel or 1), 1)
+
+    def _run_for_extensions(self, version: Version) -> None:  # type: ignore[no-any-unimported]
+        builds = self._interpreter_builds()
+        self._events.emit(
+            EventKind.BUILD_STARTED, extensions=sum(len(exts) for _, exts in builds)
+        )
+        cache = self._compiler_cache
+        cache_stats = None if cache is None else cache.stats()
+        finished: Dict[str, Any] = {}
+        all_extensions = self.extensions
+        try:
+            with self._lock_target_caches():
+                for interpreter, exts in builds:
+                    if interpreter is not None:
+                        logger.info(
+                            "building Rust extensions for Python %s (%s)",
+                            interpreter.version,
+                            interpreter.executable,
+                        )
+                    self._interpreter = interpreter
+                    self.extensions = exts
+                    self._build_extensions(version)
+        finally:
+            self.extensions = all_extensions
+            self._interpreter = None
+            if cache is not None and cache_stats is not None:
+                finished["compiler_cache"] = self._report_compiler_cache(
+                    cache, cache_stats
+                )
+            self._events.emit(EventKind.BUILD_FINISHED, **finished)
+            self._print_cargo_timings()
+
+    def _interpreter_builds(
+        self,
+    ) -> List[Tuple[Optional[Interpreter], List[RustExtension]]]:
+        """The extensions to build for each interpreter, in turn.
+
+        Without ``--interpreters``, all extensions are built for the running
+        interpreter (`None`). Otherwise, extensions which don't depend on the
+        interpreter are only built for the first one. The interpreters are
+        built for one after another rather than in parallel, as their builds
+        share cargo's target directory, where only the crates which depend on
+        the interpreter are rebuilt."""
+        if not self._interpreters:
+            return [(None, self.extensions)]
+        builds: List[Tuple[Optional[Interpreter], List[RustExtension]]] = [
+            (self._interpreters[0], self.extensions)
+        ]
+        for interpreter in self._interpreters[1:]:
+            exts = [ext for ext in self.extensions if self._depends_on_interpreter(ext)]
+            if exts:
+                builds.append((interpreter, exts))
+        return builds
+
+    def _depends_on_interpreter(self, ext: RustExtension) -> bool:
+        """Whether `ext` must be built separately for each interpreter, unlike
+        executables and modules for the limited API."""
+        return not ext._uses_exec_binding() and not _is_py_limited_api(
+            ext.py_limited_api, self._py_limited_api()
+        )
+
+    def _python_executable(self) -> Optional[str]:
+        """The interpreter to build against, if not the running one."""
+        return None if self._interpreter is None else self._interpreter.executable
+
+    def _pyo3_abi3(self, ext: RustExtension) -> Optional[bool]:
+        """The ``abi3`` setting of the pyo3 config file to build `ext` with, or
+        `None` if pyo3 should find its configuration itself: for other bindings,
+        for interpreters besides the running one, and when cross-compiling."""
+        if ext.binding != Binding.PyO3 or self._interpreter is not None:
+            return None
+        if (
+            self.target is not _Platform.CARGO_DEFAULT
+            or "CARGO_BUILD_TARGET" in (ext.env.env or os.environ)
+            or any(arg.startswith("--target") for arg in ext.args)
+        ):
+            return None
+        return _is_py_limited_api(ext.py_limited_api, self._py_limited_api())
+
+    @contextlib.contextmanager
+    def _lock_target_caches(self) -> Iterator[None]:
+        """Holds the locks of the persistent target directories used by the
+        extensions, so that no other build can replace an artifact between
+        cargo building it and it being installed."""
+        target_dirs = set()
+        for ext in self.extensions:
+            try:
+                target_dir = self._cached_target_dir(ext)
+            except Exception:
+                # reported when the extension is built
+                continue
+            if target_dir is not None:
+                target_dirs.add(target_dir)
+        with contextlib.ExitStack() as stack:
+            # in a consistent order, so that builds can't deadlock
+            for target_dir in sorted(target_dirs):
+                stack.enter_context(file_lock(Path(target_dir + ".lock")))
+            yield
+
+    def _cached_target_dir(self, ext: RustExtension) -> Optional[str]:
+        """The persistent target directory for `ext`, if enabled and the target
+        directory isn't set explicitly.
+
+        The directory is keyed by the distribution name and the location of
+        the Cargo workspace within the project, but not the project's own
+        location, which is a fresh temporary directory in isolated builds."""
+        if self._target_cache_root is None:
+            return None
+        if "CARGO_TARGET_DIR" in (ext.env.env or os.environ):
+            return None
+        quiet = self.qbuild or ext.quiet
+        workspace_root = ext.metadata(quiet=quiet)["workspace_root"]
+        name = self.distribution.get_name()
+        key = key_digest(name, Path(os.path.relpath(workspace_root)).as_posix())
+        safe_name = re.sub(r"[^\w.-]", "_", name)
+        return str(self._target_cache_root / f"{safe_name}-{key[:16]}")
+
+    def _set_target_dir(self, env: Dict[str, str], ext: RustExtension) -> None:
+        target_dir = self._cached_target_dir(ext)
+        if target_dir is not None:
+            env["CARGO_TARGET_DIR"] = target_dir
+
+    def _report_compiler_cache(
+        self, cache: CompilerCache, before: Dict[str, int]
+    ) -> Optional[Dict[str, int]]:
+        """Prints the compiler cache hits and misses since the stats `before`."""
+        after = cache.stats()
+        if after is None:
+            return None
+        stats = {key: after[key] - before[key] for key in after}
+        requests = stats["hits"] + stats["misses"]
+        if requests:
+            print(
+                f"sccache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hits'] / requests:.0%} hit rate)",
+                file=_output_stream(),
+            )
+        return stats
+
+    def _build_extensions(self, version: Version) -> None:  # type: ignore[no-any-unimported]
+        if self._parallel_workers() <= 1 and not self.batch_workspaces:
+            # Runs `run_for_extension` for each extension in turn.
+            super()._run_for_extensions(version)
+            return
+
+        extensions = []
+        for ext in self.extensions:
+            try:
+                self._check_rust_version(ext, version)
+                self._resolve_target(ext)
+            except Exception as e:
+                self._handle_extension_error(ext, e)
+            else:
+                if not self._is_unchanged(ext):
+                    extensions.append(ext)
+
+        jobs = self._plan_build_jobs(extensions)
+        workers = min(self._parallel_workers(), len(jobs))
+        if workers <= 1:
+            for job in jobs:
+                try:
+                    results = self._build_job(job)
+                except Exception as e:
+                    for ext in job:
+                        self._handle_extension_error(ext, e)
+                    continue
+                self._install_job(job, results)
+            return
+
+        # Installation stays on this thread; only the cargo builds run in the
+        # pool, each with its output captured so it can be replayed in one block.
+        pending: Dict[Future[_BufferedBuild], List[RustExtension]] = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for job in jobs:
+                    pending[executor.submit(self._build_buffered, job)] = job
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = pending.pop(future)
+                        build = future.result()
+                        sys.stderr.write(build.output)
+                        sys.stderr.flush()
+                        if build.error is not None:
+                            for ext in job:
+                                self._handle_extension_error(ext, build.error)
+                            continue
+                        assert build.results is not None
+                        self._install_job(job, build.results)
+            except BaseException:
+                # A required extension failed (or we were interrupted), so stop
+                # all other builds rather than waiting for them to complete.
+                for future in pending:
+                    future.cancel()
+                self._cargo_processes.cancel()
+                raise
+
+    def _plan_build_jobs(
+        self, extensions: List[RustExtension]
+    ) -> List[List[RustExtension]]:
+        """Split extensions into groups which are built by one cargo invocation each.
+
+        Unless `batch_workspaces` is set, every extension is built on its own."""
+        if not self.batch_workspaces:
+            return [[ext] for ext in extensions]
+
+        jobs: List[List[RustExtension]] = []
+        batches: Dict[Tuple[object, ...], List[RustExtension]] = {}
+        for ext in extensions:
+            key = self._workspace_batch_key(ext)
+            if key is None:
+                jobs.append([ext])
+            elif key in batches:
+                batches[key].append(ext)
+            else:
+                batches[key] = [ext]
+                jobs.append(batches[key])
+        return jobs
+
+    def _workspace_batch_key(self, ext: RustExtension) -> Optional[Tuple[object, ...]]:
+        """Returns a key shared by all extensions which can be built together by a
+        single `cargo build` of their workspace, or `None` if `ext` must be built
+        on its own."""
+        # Optional extensions are kept apart so that their failure cannot fail
+        # the build of required ones; `cargo build` can't pass flags to just one crate.
+        if ext.optional or ext.rustc_flags or not os.path.exists(ext.path):
+            return None
+
+        quiet = self.qbuild or ext.quiet
+        try:
+            metadata = ext.metadata(quiet=quiet)
+        except SetupError:
+            return None
+        package_id = metadata["resolve"]["root"]
+        if package_id is None:
+            return None
+
+        if not ext._uses_exec_binding():
+            # `cargo build` only produces the crate types declared in Cargo.toml.
+            [package] = [p for p in metadata["packages"] if p["id"] == package_id]
+            if not any("cdylib" in t["kind"] for t in package["targets"]):
+                return None
+            rustc_args, _ = self._config_specific_rust_args(ext, self._toolchain(ext))
+            if rustc_args:
+                return None
+
+        return (
+            metadata["workspace_root"],
+            ext.env,
+            ext.binding,
+            ext.py_limited_api,
+            tuple(sorted(ext.features)),
+            ext.args,
+            ext.cargo_manifest_args,
+            self._is_debug_build(ext),
+            ext.strip,
+            ext.cargo_timings,
+            quiet,
+        )
+
+    def _build_job(self, job: List[RustExtension]) -> List[_BuildResult]:
+        if len(job) == 1:
+            return [self.build_extension(job[0])]
+        return self.build_workspace(job)
+
+    def _install_job(
+        self, job: List[RustExtension], results: List[_BuildResult]
+    ) -> None:
+        for ext, (dylib_paths, artifact_dir) in zip(job, results):
+            try:
+                self.install_extension(ext, dylib_paths, artifact_dir)
+            except Exception as e:
+                self._handle_extension_error(ext, e)
+
+    def _build_buffered(self, job: List[RustExtension]) -> _BufferedBuild:
+        """Builds a job on a worker thread, capturing its output."""
+        output = io.StringIO()
+        _thread_output.stream = output
+        try:
+            results = self._build_job(job)
+        except Exception as e:
+            return _BufferedBuild(None, e, output.getvalue())
+        finally:
+            _thread_output.stream = None
+        return _BufferedBuild(results, None, output.getvalue())
+
+    def build_extension(self, ext: RustExtension) -> _BuildResult:
         """
         Build the Rust components, but don't install them anywhere.
 
         Returns the built modules, and the location of the single-target ``OUT_DIR``, if needed
         for copying generated files."""
-        env = _prepare_build_environment(ext.env, ext)
+        env = _prepare_build_environment(
+            ext.env,
+            ext,
+            self._compiler_cache,
+            self._python_executable(),
+            self._pyo3_abi3(ext),
+        )
 
         if not os.path.exists(ext.path):
             raise FileError(
@@ -146,7 +782,8 @@ class build_rust(RustCommand):
 
         quiet = self.qbuild or ext.quiet
         debug = self._is_debug_build(ext)
-        use_cargo_crate_type = _check_cargo_supports_crate_type_option(ext.env)
+        toolchain = self._toolchain(ext)
+        use_cargo_crate_type = _check_cargo_supports_crate_type_option(toolchain)
 
         package_id = ext.metadata(quiet=quiet)["resolve"]["root"]
         if package_id is None:
@@ -179,7 +816,9 @@ class build_rust(RustCommand):
                     "cdylib",
                     *ext.rustc_flags,
                 ]
-            extra_rustc_args, extra_rustflags = self._config_specific_rust_args(ext)
+            extra_rustc_args, extra_rustflags = self._config_specific_rust_args(
+                ext, toolchain
+            )
             rustc_args += extra_rustc_args
             rustflags += extra_rustflags
             if use_cargo_crate_type and "--crate-type" not in cargo_args:
@@ -195,35 +834,110 @@ class build_rust(RustCommand):
                 *cargo_args,
             ]
 
-        if rustflags:
-            existing_rustflags = env.get("RUSTFLAGS")
-            if existing_rustflags is not None:
-                rustflags.append(existing_rustflags)
-            new_rustflags = " ".join(rustflags)
-            env["RUSTFLAGS"] = new_rustflags
+        _add_rustflags(env, rustflags, quiet=quiet)
+        self._set_strip_profile(env, ext, toolchain)
+        self._set_target_dir(env, ext)
+        cargo_messages = self._run_cargo_for_targets(
+            command, rustc_args, env, toolchain, ext, quiet=quiet
+        )
+        with self._timed(EventKind.ARTIFACT_LOOKUP, ext):
+            return self._find_built_modules(
+                ext, package_id, cargo_messages, quiet=quiet
+            )
 
-            # print RUSTFLAGS being added before the command
-            if not quiet:
-                print(f"[RUSTFLAGS={new_rustflags}]", end=" ", file=sys.stderr)
+    def build_workspace(self, exts: List[RustExtension]) -> List[_BuildResult]:
+        """
+        Build several extensions from the same Cargo workspace with a single
+        ``cargo build``, but don't install them anywhere.
+
+        All extensions must share the build configuration, as grouped by
+        `_plan_build_jobs`. Returns the result of `build_extension` for each
+        extension, in order."""
+        first = exts[0]
+        env = _prepare_build_environment(
+            first.env,
+            first,
+            self._compiler_cache,
+            self._python_executable(),
+            self._pyo3_abi3(first),
+        )
+        quiet = self.qbuild or first.quiet
+        debug = self._is_debug_build(first)
+        toolchain = self._toolchain(first)
+
+        metadata = first.metadata(quiet=quiet)
+        package_ids = [ext.metadata(quiet=quiet)["resolve"]["root"] for ext in exts]
+        package_names = {
+            p["name"] for p in metadata["packages"] if p["id"] in package_ids
+        }
+
+        command = [
+            self.cargo,
+            "build",
+            "--message-format=json-render-diagnostics",
+            "--manifest-path",
+            os.path.join(metadata["workspace_root"], "Cargo.toml"),
+        ]
+        for name in sorted(package_names):
+            command += ["-p", name]
+        if not first._uses_exec_binding():
+            # as `cargo rustc --lib` does for a single extension, leave out the
+            # binaries and other targets of the packages
+            command += ["--lib"]
+        command += self._cargo_args(ext=first, release=not debug, quiet=quiet)
+
+        if not first._uses_exec_binding():
+            _, rustflags = self._config_specific_rust_args(first, toolchain)
+            _add_rustflags(env, rustflags, quiet=quiet)
+        self._set_strip_profile(env, first, toolchain)
+        self._set_target_dir(env, first)
+
+        cargo_messages = self._run_cargo_for_targets(
+            command, [], env, toolchain, exts, quiet=quiet
+        )
+        results = []
+        for ext, package_id in zip(exts, package_ids):
+            with self._timed(EventKind.ARTIFACT_LOOKUP, ext):
+                results.append(
+                    self._find_built_modules(
+                        ext, package_id, cargo_messages, quiet=quiet
+                    )
+                )
+        return results
+
+    def _run_cargo_for_targets(
+        self,
+        command: List[str],
+        rustc_args: List[str],
+        env: Dict[str, str],
+        toolchain: ToolchainInfo,
+        exts: Union[RustExtension, List[RustExtension]],
+        *,
+        quiet: bool,
+    ) -> Dict[str, CargoMessageIndex]:
+        """Runs `command` once for each target being built, returning the index of
+        cargo's messages keyed by target triple."""
+        if isinstance(exts, RustExtension):
+            exts = [exts]
 
         if self.target is _Platform.CARGO_DEFAULT:
             targets: List[Optional[str]] = [None]
         elif self.target is _Platform.UNIVERSAL2:
             targets = list(_UNIVERSAL2_TARGETS)
-            if ext.generated_files:
+            if any(ext.generated_files for ext in exts):
                 raise PlatformError(
                     "generated files are not supported for universal2 wheels"
                 )
         else:
             targets = [self.target]
 
-        cargo_messages: Dict[str, List[str]] = {}
+        cargo_messages: Dict[str, CargoMessageIndex] = {}
         for target in targets:
             target_command = command.copy()
             if target is None:
                 # Normalize the entries in `cargo_messages` to always be in terms of the
                 # actual target triple.
-                target = get_rust_host(ext.env)
+                target = toolchain.host
             else:
                 target_command += ["--target", target]
             if rustc_args:
@@ -231,30 +945,160 @@ class build_rust(RustCommand):
                 target_command += rustc_args
 
             if not quiet:
-                print(" ".join(target_command), file=sys.stderr)
+                print(" ".join(target_command), file=_output_stream())
+
+            timings = self._cargo_timings(exts[0])
+            reports_dir = None
+            timings_lock: Any = contextlib.nullcontext()
+            if "html" in timings:
+                target_dir = (
+                    self._cached_target_dir(exts[0])
+                    or exts[0].metadata(quiet=quiet)["target_directory"]
+                )
+                reports_dir = os.path.join(target_dir, "cargo-timings")
+                # cargo locks the target directory while building anyway, so
+                # holding this until the report is collected costs no parallelism
+                timings_lock = self._cargo_timings_lock(reports_dir)
+
+            with timings_lock:
+                previous_reports = _cargo_timing_reports(reports_dir)
+                cargo_messages[target] = self._run_cargo_with_events(
+                    exts, target, target_command, env, quiet=quiet
+                )
+                if timings:
+                    report = None
+                    if reports_dir is not None:
+                        report = _new_cargo_timing_report(reports_dir, previous_reports)
+                    self._collect_cargo_timings(
+                        exts,
+                        target,
+                        cargo_messages[target],
+                        timings,
+                        html_report=report,
+                    )
+        return cargo_messages
+
+    def _cargo_timings_lock(self, reports_dir: str) -> threading.Lock:
+        """The lock held while cargo writes timing reports into `reports_dir`
+        and they are collected, so parallel builds can't mix them up."""
+        with self._cargo_timings_locks_guard:
+            return self._cargo_timings_locks.setdefault(
+                os.path.abspath(reports_dir), threading.Lock()
+            )
 
-            # Execute cargo
-            try:
-                # If quiet, capture all output and only show it in the exception
-                # If not quiet, forward all cargo output to stderr
-                stderr = subprocess.PIPE if quiet else None
-                cargo_messages[target] = check_subprocess_output(
-                    target_command,
-                    env=env,
-                    stderr=stderr,
-                    text=True,
-                ).splitlines()
-            except subprocess.CalledProcessError as e:
-                # Don't include stdout in the formatted error as it is a huge dump
-                # of cargo json lines which aren't helpful for the end user.
-                raise CompileError(format_called_process_error(e, include_stdout=False))
+    def _run_cargo_with_events(
+        self,
+        exts: List[RustExtension],
+        target: str,
+        target_command: List[str],
+        env: Dict[str, str],
+        *,
+        quiet: bool,
+    ) -> CargoMessageIndex:
+        """Runs cargo for `exts`, emitting its start and finish events."""
+        cargo_run = next(self._cargo_runs)
+        self._events.emit(
+            EventKind.CARGO_STARTED,
+            exts[0].name if len(exts) == 1 else None,
+            command=target_command,
+            target=target,
+            extensions=[ext.name for ext in exts],
+            crates=self._estimate_crates(exts, quiet=quiet),
+            cargo_run=cargo_run,
+        )
+        with self._timed(
+            EventKind.CARGO_FINISHED,
+            exts[0] if len(exts) == 1 else None,
+            cargo_run=cargo_run,
+        ):
+            return self._run_cargo(
+                target_command, env, quiet=quiet, cargo_run=cargo_run
+            )
 
-            except OSError:
-                raise ExecError(
-                    "Unable to execute 'cargo' - this package "
-                    "requires Rust to be installed and cargo to be on the PATH"
-                )
+    def _cargo_timings(self, ext: RustExtension) -> List[str]:
+        """The ``--timings`` report formats to build `ext` with, if any."""
+        value = (
+            ext.cargo_timings if ext.cargo_timings is not None else self.cargo_timings
+        )
+        return _cargo_timings_formats(value) if value else []
+
+    def _collect_cargo_timings(
+        self,
+        exts: List[RustExtension],
+        target: str,
+        messages: CargoMessageIndex,
+        formats: List[str],
+        *,
+        html_report: Optional[str],
+    ) -> None:
+        """Saves the timing reports of a cargo run for `target` to
+        `cargo_timings_dir`, which would otherwise be overwritten by the next
+        run, and records the time taken by each crate.
+
+        `html_report` is the HTML report this run wrote, if any."""
+        assert self.cargo_timings_dir is not None
+        os.makedirs(self.cargo_timings_dir, exist_ok=True)
+        stem = os.path.join(
+            self.cargo_timings_dir, "+".join(ext.name for ext in exts) + f"-{target}"
+        )
 
+        timings = []
+        if "json" in formats:
+            with open(stem + ".json", "w", encoding="utf-8") as f:
+                for message in messages.timings:
+                    f.write(json.dumps(message) + "\n")
+            self._cargo_timing_reports.append(stem + ".json")
+            timings = unit_timings(messages.timings)
+        if "html" in formats:
+            try:
+                if html_report is None:
+                    raise FileNotFoundError("cargo wrote no HTML timing report")
+                shutil.copyfile(html_report, stem + ".html")
+            except OSError as e:
+                logger.warning("could not collect cargo timing report: %s", e)
+            else:
+                self._cargo_timing_reports.append(stem + ".html")
+                if not timings:
+                    with open(stem + ".html", encoding="utf-8") as f:
+                        timings = html_unit_timings(f.read())
+        self._crate_timings.extend(timings)
+
+    def _print_cargo_timings(self) -> None:
+        """Lists the collected cargo timing reports and the slowest crates."""
+        if not self._cargo_timing_reports:
+            return
+        output = _output_stream()
+        print(f"cargo timing reports saved to {self.cargo_timings_dir}:", file=output)
+        for report in self._cargo_timing_reports:
+            print(f"    {os.path.basename(report)}", file=output)
+        if self._crate_timings:
+            print("slowest crates:", file=output)
+            slowest = sorted(self._crate_timings, reverse=True)
+            for duration, name in slowest[:_CARGO_TIMINGS_SUMMARY_LENGTH]:
+                print(f"    {duration:8.2f}s  {name}", file=output)
+
+    def _estimate_crates(self, exts: List[RustExtension], *, quiet: bool) -> int:
+        """Estimates the number of crates cargo builds for `exts`, for progress
+        reporting."""
+        if not self._events:
+            return 0
+        package_ids = []
+        for ext in exts:
+            try:
+                metadata = ext.metadata(quiet=quiet)
+            except SetupError:
+                return 0
+            package_ids.append(metadata["resolve"]["root"])
+        return _count_dependencies(metadata, package_ids)
+
+    def _find_built_modules(
+        self,
+        ext: RustExtension,
+        package_id: str,
+        cargo_messages: Dict[str, CargoMessageIndex],
+        *,
+        quiet: bool,
+    ) -> _BuildResult:
         # Find the shared library that cargo hopefully produced and copy
         # it into the build directory as if it were produced by build_ext.
 
@@ -262,11 +1106,11 @@ class build_rust(RustCommand):
 
         if ext._uses_exec_binding():
             # Find artifact from cargo messages
-            artifacts = _find_cargo_artifacts(
-                [line for messages in cargo_messages.values() for line in messages],
-                package_id=package_id,
-                kinds={"bin"},
-            )
+            artifacts = [
+                artifact
+                for messages in cargo_messages.values()
+                for artifact in messages.artifacts(package_id, kinds={"bin"})
+            ]
             if self.target is _Platform.UNIVERSAL2:
                 artifacts = _combine_universal2_artifacts(artifacts)
             for name, dest in ext.target.items():
@@ -286,17 +1130,25 @@ class build_rust(RustCommand):
 
                 if os.environ.get("CARGO") == "cross":
                     artifact_path = _replace_cross_target_dir(
-                        artifact_path, ext, quiet=quiet
+                        artifact_path,
+                        ext,
+                        self._cached_target_dir(ext),
+                        quiet=quiet,
                     )
 
                 dylib_paths.append(_BuiltModule(dest, artifact_path))
+                self._events.emit(
+                    EventKind.ARTIFACT_READY, ext.name, module=dest, path=artifact_path
+                )
         else:
             # Find artifact from cargo messages
-            artifacts = _find_cargo_artifacts(
-                [line for messages in cargo_messages.values() for line in messages],
-                package_id=package_id,
-                kinds={"cdylib", "dylib"},
-            )
+            artifacts = [
+                artifact
+                for messages in cargo_messages.values()
+                for artifact in messages.artifacts(
+                    package_id, kinds={"cdylib", "dylib"}
+                )
+            ]
             if self.target is _Platform.UNIVERSAL2:
                 artifacts = _combine_universal2_artifacts(artifacts)
             if len(artifacts) == 0:
@@ -312,19 +1164,22 @@ class build_rust(RustCommand):
 
             if os.environ.get("CARGO") == "cross":
                 artifact_path = _replace_cross_target_dir(
-                    artifact_path, ext, quiet=quiet
+                    artifact_path, ext, self._cached_target_dir(ext), quiet=quiet
                 )
 
             # guaranteed to be just one element after checks above
             dylib_paths.append(_BuiltModule(ext.name, artifact_path))
+            self._events.emit(
+                EventKind.ARTIFACT_READY, ext.name, module=ext.name, path=artifact_path
+            )
 
         if not ext.generated_files:
             return dylib_paths, None
 
         out_dirs = [
             out_dir
-            for target, messages in cargo_messages.items()
-            if (out_dir := _find_cargo_out_dir(messages, package_id)) is not None
+            for messages in cargo_messages.values()
+            if (out_dir := messages.out_dir(package_id)) is not None
         ]
         if not out_dirs:
             raise FileError(
@@ -341,53 +1196,105 @@ class build_rust(RustCommand):
 
         return dylib_paths, out_dirs[0]
 
+    def _run_cargo(
+        self,
+        command: List[str],
+        env: Dict[str, str],
+        *,
+        quiet: bool,
+        cargo_run: int,
+    ) -> CargoMessageIndex:
+        """Runs a cargo build command, indexing the JSON messages it prints to
+        stdout as they arrive."""
+        # If quiet, capture all output and only show it in the exception.
+        # If building on a worker thread, capture output to be replayed later.
+        # Otherwise, forward all cargo output to stderr.
+        buffer = getattr(_thread_output, "stream", None)
+        capture_stderr = quiet or buffer is not None
+        # Captured stderr goes to a file, so that cargo can't block writing to a
+        # full pipe while we are reading stdout.
+        with tempfile.TemporaryFile(
+            mode="w+", encoding="utf-8", errors="replace"
+        ) as stderr_file:
+            try:
+                process = self._cargo_processes.start(
+                    command,
+                    env=env,
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file if capture_stderr else None,
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace",
+                )
+            except OSError:
+                raise ExecError(
+                    "Unable to execute 'cargo' - this package "
+                    "requires Rust to be installed and cargo to be on the PATH"
+                )
+            messages = CargoMessageIndex()
+            try:
+                assert process.stdout is not None
+                with process.stdout:
+                    for line in process.stdout:
+                        message = messages.add_line(line)
+                        if message and message["reason"] == "compiler-artifact":
+                            self._events.emit(
+                                EventKind.CRATE_FINISHED,
+                                cargo_run=cargo_run,
+                                package_id=message["package_id"],
+                                crate=message["target"]["name"],
+                                kinds=message["target"]["kind"],
+                                fresh=message.get("fresh", False),
+                            )
+                process.wait()
+            finally:
+                self._cargo_processes.finish(process)
+
+            stderr_file.seek(0)
+            stderr = stderr_file.read()
+
+        if process.returncode != 0:
+            # cargo's stdout is just its json messages, which aren't helpful for
+            # the end user, so it isn't kept for the formatted error.
+            e = subprocess.CalledProcessError(
+                process.returncode, command, None, stderr if capture_stderr else None
+            )
+            raise CompileError(format_called_process_error(e, include_stdout=False))
+
+        if buffer is not None and not quiet and stderr:
+            buffer.write(stderr)
+        return messages
+
     def install_extension(
         self,
         ext: RustExtension,
         dylib_paths: List["_BuiltModule"],
         build_artifact_dir: Optional[Path],
     ) -> None:
-        debug_build = self._is_debug_build(ext)
-
-        # Ask build_ext where the shared library would go if it had built it,
-        # then copy it there.
-        build_ext = cast(CommandBuildExt, self.get_finalized_command("build_ext"))
-        build_ext.inplace = self.inplace
-
+        strip_args = []
+        if self._strip_level(ext) and not _supports_link_time_strip(
+            self._toolchain(ext)
+        ):
+            # Fall back to stripping the installed artifact.
+            if ext.strip == Strip.All:
+                strip_args.append("-x")
+            elif ext.strip == Strip.Debug:
+                strip_args.append("-S")
+        split = self._splits_debuginfo(ext)
+        install_options = [strip_args, self.split_debug_dir if split else None]
+
+        installed_paths = []
         for module_name, dylib_path in dylib_paths:
             if not module_name:
                 module_name = os.path.basename(
                     os.path.splitext(os.path.basename(dylib_path)[3:])[0]
                 )
 
-            if ext._uses_exec_binding():
-                exe = sysconfig.get_config_var("EXE")
-
-                if isinstance(ext, RustBin):
-                    # will install the rust binary into the scripts directory
-                    bin_name = module_name
-                    if exe is not None:
-                        bin_name += exe
-
-                    install_scripts = cast(
-                        CommandInstallScripts,
-                        self.get_finalized_command("install_scripts"),
-                    )
-                    ext_path = os.path.join(install_scripts.build_dir, bin_name)
-                else:
-                    # will install the rust binary into the module directory
-                    ext_path = build_ext.get_ext_fullpath(module_name)
-
-                    # add expected extension
-                    ext_path, _, _ = _split_platform_and_extension(ext_path)
-                    if exe is not None:
-                        ext_path += exe
-
-                    # if required, also generate a console script entry point
-                    ext.install_script(module_name.split(".")[-1], ext_path)
-            else:
-                # will install the rust library into the module directory
-                ext_path = self.get_dylib_ext_path(ext, module_name)
+            ext_path = self._get_install_path(ext, module_name)
+            if ext._uses_exec_binding() and not isinstance(ext, RustBin):
+                # if required, also generate a console script entry point
+                ext.install_script(module_name.split(".")[-1], ext_path)
+            installed_paths.append(ext_path)
 
             os.makedirs(os.path.dirname(ext_path), exist_ok=True)
 
@@ -400,6 +1307,13 @@ class build_rust(RustCommand):
             if ext_path.startswith(cwd):
                 ext_path = os.path.relpath(ext_path, cwd)
 
+            # Leave identical artifacts untouched, to keep their modification
+            # times stable for anything downstream.
+            record_path = self._install_record_path(ext_path)
+            if install_is_current(record_path, dylib_path, ext_path, install_options):
+                logger.info("Rust artifact %s is unchanged, not copying", ext_path)
+                continue
+
             logger.info("Copying rust artifact from %s to %s", dylib_path, ext_path)
 
             # We want to atomically replace any existing library file. We can't
@@ -409,9 +1323,28 @@ class build_rust(RustCommand):
             # will see it modified and likely segfault.
             #
             # We first copy the file to the same directory, as `os.replace`
-            # doesn't work across file system boundaries.
+            # doesn't work across file system boundaries. Where possible, the
+            # "copy" is a clone or a hardlink of cargo's artifact, which cargo
+            # also replaces rather than modifies when it rebuilds.
             temp_ext_path = ext_path + "~"
-            shutil.copyfile(dylib_path, temp_ext_path)
+            with self._timed(
+                EventKind.COPY, ext, source=dylib_path, destination=ext_path
+            ):
+                method = place_file(
+                    dylib_path,
+                    temp_ext_path,
+                    self.install_strategy,
+                    # stripping would modify cargo's artifact through the link
+                    may_link=not strip_args and not split,
+                )
+                logger.debug("Installed %s by %s", ext_path, method)
+
+            if split:
+                with self._timed(EventKind.STRIP, ext, path=ext_path) as data:
+                    data["debug_path"] = self._split_debuginfo(
+                        ext, module_name, dylib_path, temp_ext_path
+                    )
+
             try:
                 os.replace(temp_ext_path, ext_path)
             except PermissionError as e:
@@ -421,16 +1354,9 @@ class build_rust(RustCommand):
                     msg += "\n  hint: the file may be in use by another Python process"
                 raise CompileError(msg)
 
-            if sys.platform != "win32" and not debug_build:
-                args = []
-                if ext.strip == Strip.All:
-                    args.append("-x")
-                elif ext.strip == Strip.Debug:
-                    args.append("-S")
-
-                if args:
-                    args.insert(0, "strip")
-                    args.append(ext_path)
+            if strip_args:
+                args = ["strip", *strip_args, ext_path]
+                with self._timed(EventKind.STRIP, ext, path=ext_path):
                     try:
                         check_subprocess_output(args, env=None)
                     except subprocess.CalledProcessError:
@@ -438,17 +1364,41 @@ class build_rust(RustCommand):
 
             # executables, win32(cygwin)-dll's, and shared libraries on
             # Unix-like operating systems need X bits
-            mode = os.stat(ext_path).st_mode
-            mode |= (mode & 0o444) >> 2  # copy R bits to X
-            os.chmod(ext_path, mode)
+            with self._timed(EventKind.CHMOD, ext, path=ext_path):
+                mode = os.stat(ext_path).st_mode
+                mode |= (mode & 0o444) >> 2  # copy R bits to X
+                os.chmod(ext_path, mode)
 
-        if not ext.generated_files:
-            return
+            record_install(record_path, dylib_path, ext_path, install_options)
+
+        if ext.generated_files:
+            with self._timed(EventKind.GENERATED_FILES, ext):
+                installed_paths += self._install_generated_files(
+                    ext, build_artifact_dir
+                )
+
+        if self.skip_unchanged:
+            self._record_fingerprint(ext, dylib_paths, installed_paths)
+
+        self._events.emit(
+            EventKind.EXTENSION_DONE, ext.name, installed=installed_paths, skipped=False
+        )
+
+    def _install_generated_files(
+        self, ext: RustExtension, build_artifact_dir: Optional[Path]
+    ) -> List[str]:
+        """Syncs `ext.generated_files` into their packages, returning the paths
+        they were installed to.
+
+        Only changed files are copied, and files installed by the previous sync
+        which are no longer generated are removed."""
         if build_artifact_dir is None:
             raise FileError(
                 "there are generated files to install but no build-artifact directory"
             )
 
+        build_ext = cast(CommandBuildExt, self.get_finalized_command("build_ext"))
+
         # We'll delegate the finding of the package directories to Setuptools, so we
         # can be sure we're handling editable installs and other complex situations
         # correctly.
@@ -461,37 +1411,215 @@ class build_rust(RustCommand):
             # ... If not, `build_ext` knows where to put the package.
             return Path(build_ext.build_lib) / Path(*package.split("."))
 
+        installed_paths = []
         missed_matches = []
+        package_dirs = []
+        synced_files: List[str] = []
         for source, package in ext.generated_files.items():
             dest = get_package_dir(package)
             dest.mkdir(mode=0o755, parents=True, exist_ok=True)
+            package_dirs.append(str(dest))
             source_full = build_artifact_dir / source
             dest_full = dest / source_full.name
+            installed_paths.append(str(dest_full))
             if source_full.is_file():
-                logger.info("Copying data file from %s to %s", source_full, dest_full)
-                shutil.copy2(source_full, dest_full)
+                logger.info("Syncing data file from %s to %s", source_full, dest_full)
             elif source_full.is_dir():
                 logger.info(
-                    "Copying data directory from %s to %s", source_full, dest_full
+                    "Syncing data directory from %s to %s", source_full, dest_full
                 )
-                shutil.copytree(source_full, dest_full, dirs_exist_ok=True)
             else:
                 missed_matches.append(source)
+                continue
+            synced_files += sync_tree(source_full, dest_full)
         if missed_matches:
             raise FileError(f"failed to find build artifacts for {missed_matches}")
 
+        manifest_path = self._generated_files_manifest_path(ext, package_dirs)
+        try:
+            previous_files = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            previous_files = []
+        remove_stale_files(previous_files, synced_files, package_dirs)
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps(sorted(synced_files)), encoding="utf-8")
+        return installed_paths
+
+    def _generated_files_manifest_path(
+        self, ext: RustExtension, package_dirs: List[str]
+    ) -> Path:
+        """Where the list of generated files last installed for `ext` into
+        `package_dirs` is kept.
+
+        The list is kept per destination, so that an inplace build and a build
+        into the build directory don't remove each other's files."""
+        build_ext = cast(CommandBuildExt, self.get_finalized_command("build_ext"))
+        name = re.sub(r"[^\w.-]", "_", ext.name)
+        destination = key_digest(sorted(os.path.abspath(d) for d in package_dirs))
+        return Path(
+            build_ext.build_temp,
+            "setuptools-rust",
+            f"{name}-{destination[:16]}.generated.json",
+        )
+
+    def _install_record_path(self, ext_path: str) -> Path:
+        """Where the record of the artifact installed to `ext_path` is kept.
+
+        This is in the build directory rather than next to `ext_path`, so it
+        can't end up in wheels or source trees."""
+        build_ext = cast(CommandBuildExt, self.get_finalized_command("build_ext"))
+        name = key_digest(os.path.abspath(ext_path))
+        return Path(
+            build_ext.build_temp, "setuptools-rust", "installed", f"{name}.json"
+        )
+
+    def _fingerprint_path(self, ext: RustExtension) -> Path:
+        build_ext = cast(CommandBuildExt, self.get_finalized_command("build_ext"))
+        name = re.sub(r"[^\w.-]", "_", ext.name)
+        if self._interpreter is not None:
+            name += re.sub(r"[^\w.-]", "_", self._interpreter.ext_suffix)
+        return Path(build_ext.build_temp, "setuptools-rust", f"{name}.fingerprint.json")
+
+    def _fingerprint_config(self, ext: RustExtension) -> str:
+        """Digest of everything besides file contents which affects the build of `ext`."""
+        env = _prepare_build_environment(
+            ext.env, ext, python_executable=self._python_executable()
+        )
+        if self._interpreter is None:
+            python = [sys.version, get_config_var("EXT_SUFFIX")]
+        else:
+            python = [self._interpreter.version, self._interpreter.ext_suffix]
+        return config_digest(
+            {
+                "setuptools-rust": __version__,
+                "extension": [
+                    type(ext).__name__,
+                    ext.name,
+                    ext.target,
+                    ext.path,
+                    ext.args,
+                    ext.cargo_manifest_args,
+                    ext.features,
+                    ext.rustc_flags,
+                    ext.binding.name,
+                    ext.strip.name,
+                    ext.py_limited_api,
+                    ext.generated_files,
+                ],
+                "build": [
+                    self._is_debug_build(ext),
+                    os.getenv("SETUPTOOLS_RUST_CARGO_PROFILE"),
+                    str(self.target),
+                    self.plat_name,
+                    self.inplace,
+                    self._py_limited_api(),
+                ],
+                "rustc": self._toolchain(ext).version_verbose,
+                "python": python,
+                "env": {
+                    key: value
+                    for key, value in env.items()
+                    if key.startswith(_FINGERPRINT_ENV_PREFIXES)
+                },
+            }
+        )
+
+    def _is_unchanged(self, ext: RustExtension) -> bool:
+        """Whether `ext` can be skipped, because its fingerprint proves that its
+        installed artifacts are up to date."""
+        if not self.skip_unchanged:
+            return False
+        try:
+            config = self._fingerprint_config(ext)
+        except Exception:
+            return False
+        if fingerprint_is_fresh(self._fingerprint_path(ext), config):
+            logger.info("Rust extension %s is up to date, skipping build", ext.name)
+            self._events.emit(EventKind.EXTENSION_DONE, ext.name, skipped=True)
+            return True
+        return False
+
+    def _record_fingerprint(
+        self,
+        ext: RustExtension,
+        dylib_paths: List[_BuiltModule],
+        installed_paths: List[str],
+    ) -> None:
+        inputs = []
+        for _, dylib_path in dylib_paths:
+            sources = dep_info_sources(dylib_path)
+            if sources is None:
+                # Without cargo's dep-info there's no way to prove freshness later.
+                return
+            inputs += sources
+
+        # Manifests and cargo configuration aren't part of the dep-info.
+        quiet = self.qbuild or ext.quiet
+        metadata = ext.metadata(quiet=quiet)
+        workspace_root = metadata["workspace_root"]
+        inputs.append(os.path.join(workspace_root, "Cargo.lock"))
+        inputs += [
+            package["manifest_path"]
+            for package in metadata["packages"]
+            if package["source"] is None
+        ]
+        inputs += cargo_config_paths()
+
+        write_fingerprint(
+            self._fingerprint_path(ext),
+            self._fingerprint_config(ext),
+            inputs,
+            [os.path.abspath(path) for path in installed_paths],
+        )
+
+    def _get_install_path(self, ext: RustExtension, module_name: str) -> str:
+        """Where the artifact for `module_name` of `ext` is installed to."""
+        # Ask build_ext where the shared library would go if it had built it.
+        build_ext = cast(CommandBuildExt, self.get_finalized_command("build_ext"))
+        build_ext.inplace = self.inplace
+
+        if not ext._uses_exec_binding():
+            # will install the rust library into the module directory
+            return self.get_dylib_ext_path(ext, module_name)
+
+        exe = sysconfig.get_config_var("EXE")
+        if isinstance(ext, RustBin):
+            # will install the rust binary into the scripts directory
+            bin_name = module_name
+            if exe is not None:
+                bin_name += exe
+
+            install_scripts = cast(
+                CommandInstallScripts,
+                self.get_finalized_command("install_scripts"),
+            )
+            return os.path.join(install_scripts.build_dir, bin_name)
+
+        # will install the rust binary into the module directory
+        ext_path = build_ext.get_ext_fullpath(module_name)
+
+        # add expected extension
+        ext_path, _, _ = _split_platform_and_extension(ext_path)
+        if exe is not None:
+            ext_path += exe
+        return ext_path
+
     def get_dylib_ext_path(self, ext: RustExtension, target_fname: str) -> str:
         assert self.plat_name is not None
         build_ext = cast(CommandBuildExt, self.get_finalized_command("build_ext"))
 
         ext_path: str = build_ext.get_ext_fullpath(target_fname)
+        so_ext = get_config_var("EXT_SUFFIX")
+        assert isinstance(so_ext, str)
+
+        if self._interpreter is not None:
+            ext_path = ext_path[: -len(so_ext)] + self._interpreter.ext_suffix
+            so_ext = self._interpreter.ext_suffix
 
         if _is_py_limited_api(ext.py_limited_api, self._py_limited_api()):
             abi3_suffix = get_abi3_suffix()
             if abi3_suffix is not None:
-                so_ext = get_config_var("EXT_SUFFIX")
-                assert isinstance(so_ext, str)
-                ext_path = ext_path[: -len(so_ext)] + get_abi3_suffix()
+                ext_path = ext_path[: -len(so_ext)] + abi3_suffix
 
         if ".abi3." in ext_path:
             return ext_path
@@ -529,6 +1657,84 @@ class build_rust(RustCommand):
         else:
             return cast(_PyLimitedApi, bdist_wheel.py_limited_api)
 
+    def _cargo_profile(self, ext: RustExtension) -> str:
+        """The name of the cargo profile `ext` is built with."""
+        return (
+            os.getenv("SETUPTOOLS_RUST_CARGO_PROFILE")
+            or ext.get_cargo_profile()
+            or ("dev" if self._is_debug_build(ext) else "release")
+        )
+
+    def _strip_level(self, ext: RustExtension) -> Optional[str]:
+        """The cargo profile ``strip`` setting for `ext`, if it is to be stripped."""
+        if sys.platform == "win32" or self._is_debug_build(ext):
+            return None
+        if ext.strip == Strip.All:
+            return "symbols"
+        elif ext.strip == Strip.Debug:
+            return "debuginfo"
+        return None
+
+    def _splits_debuginfo(self, ext: RustExtension) -> bool:
+        return ext.strip == Strip.Split and not self._is_debug_build(ext)
+
+    def _set_strip_profile(
+        self, env: Dict[str, str], ext: RustExtension, toolchain: ToolchainInfo
+    ) -> None:
+        """Configures the cargo profile for the strip mode of `ext`.
+
+        Where possible, rustc strips `ext` as it is linked, so that the artifact
+        needs no separate ``strip`` pass after it is installed."""
+        profile = self._cargo_profile(ext).upper().replace("-", "_")
+        # Explicit settings in the environment take precedence.
+        if self._splits_debuginfo(ext):
+            env.setdefault(f"CARGO_PROFILE_{profile}_DEBUG", "true")
+            if sys.platform == "darwin":
+                # Have cargo collect the debug info into a `.dSYM` bundle.
+                env.setdefault(f"CARGO_PROFILE_{profile}_SPLIT_DEBUGINFO", "packed")
+            return
+        level = self._strip_level(ext)
+        if level is None or not _supports_link_time_strip(toolchain):
+            return
+        env.setdefault(f"CARGO_PROFILE_{profile}_STRIP", level)
+
+    def _split_debuginfo(
+        self, ext: RustExtension, module_name: str, dylib_path: str, temp_path: str
+    ) -> Optional[str]:
+        """Collects the debug info of the artifact `dylib_path` into the split
+        debug directory, removing it from the copy at `temp_path` where needed.
+
+        Returns where the debug info was collected to, if anywhere."""
+        assert self.split_debug_dir is not None
+        debug_dir = Path(self.split_debug_dir, *module_name.split(".")[:-1])
+        install_name = os.path.basename(self._get_install_path(ext, module_name))
+        try:
+            if sys.platform == "darwin":
+                dsym = dylib_path + ".dSYM"
+                if not os.path.isdir(dsym):
+                    return None
+                dest = debug_dir / (install_name + ".dSYM")
+                shutil.rmtree(dest, ignore_errors=True)
+                shutil.copytree(dsym, dest)
+            elif sys.platform == "win32":
+                pdb = os.path.splitext(dylib_path)[0] + ".pdb"
+                if not os.path.isfile(pdb):
+                    return None
+                dest = debug_dir / (os.path.splitext(install_name)[0] + ".pdb")
+                debug_dir.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(pdb, dest)
+            else:
+                dest = debug_dir / (install_name + ".debug")
+                split_elf_debuginfo(temp_path, str(dest))
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(
+                "failed to split debug info out of %s, installing it unstripped: %s",
+                dylib_path,
+                e,
+            )
+            return None
+        return str(dest)
+
     def _is_debug_build(self, ext: RustExtension) -> bool:
         if self.release:
             return False
@@ -570,6 +1776,13 @@ class build_rust(RustCommand):
         if ext.args is not None:
             args.extend(ext.args)
 
+        timings = self._cargo_timings(ext)
+        if timings == ["html"]:
+            # choosing the format is unstable; the HTML report is the default
+            args.append("--timings")
+        elif timings:
+            args += [f"--timings={','.join(timings)}", "-Zunstable-options"]
+
         if env_profile:
             if ext_profile:
                 args = [p for p in args if not p.startswith("--profile=")]
@@ -588,7 +1801,7 @@ class build_rust(RustCommand):
         return args
 
     def _config_specific_rust_args(
-        self, ext: RustExtension
+        self, ext: RustExtension, toolchain: ToolchainInfo
     ) -> Tuple[List[str], List[str]]:
         """Get extra arguments for `rustc` and the `RUSTFLAGS` environment variable
         that depend on the specific environmental configuration for the compilation
@@ -612,8 +1825,7 @@ class build_rust(RustCommand):
             rustc_args += apple_specific_rustc()
             return rustc_args, rust_flags
 
-        target_triple = None if self.target is _Platform.CARGO_DEFAULT else self.target
-        rustc_cfgs = get_rustc_cfgs(target_triple, ext.env)
+        rustc_cfgs = toolchain.cfgs
         target_os = rustc_cfgs.get("target_os")
         if target_os in ("macos", "ios", "tvos", "watchos"):
             rustc_args += apple_specific_rustc()
@@ -702,6 +1914,137 @@ class _BuiltModule(NamedTuple):
     path: str
 
 
+# The built modules of an extension, and the location of its single-target
+# ``OUT_DIR``, if needed for copying generated files.
+_BuildResult = Tuple[List[_BuiltModule], Optional[Path]]
+
+
+class _BufferedBuild(NamedTuple):
+    """Outcome of a build job run on a parallel worker thread."""
+
+    results: Optional[List[_BuildResult]]
+    error: Optional[Exception]
+    output: str
+
+
+_thread_output = threading.local()
+
+
+def _cargo_timings_formats(value: str) -> List[str]:
+    """Parses and checks a ``cargo-timings`` setting.
+
+    >>> _cargo_timings_formats("html, json")
+    ['html', 'json']
+    """
+    formats = [f.strip() for f in value.split(",") if f.strip()]
+    if not formats or any(f not in _CARGO_TIMINGS_FORMATS for f in formats):
+        raise SetupError(
+            f"cargo-timings must be 'html', 'json' or 'html,json', not {value!r}"
+        )
+    return formats
+
+
+def _cargo_timing_reports(reports_dir: Optional[str]) -> Set[str]:
+    """The timestamped HTML reports cargo has written into `reports_dir`."""
+    if reports_dir is None or not os.path.isdir(reports_dir):
+        return set()
+    return {
+        name
+        for name in os.listdir(reports_dir)
+        if name.startswith("cargo-timing-") and name.endswith(".html")
+    }
+
+
+def _new_cargo_timing_report(reports_dir: str, previous: Set[str]) -> Optional[str]:
+    """The timestamped HTML report which cargo wrote into `reports_dir` since
+    it held the reports `previous`, if any.
+
+    Cargo also writes the latest report to ``cargo-timing.html``, but another
+    build using the same target directory may replace that first."""
+    new = sorted(_cargo_timing_reports(reports_dir) - previous)
+    if not new:
+        return None
+    # the names contain the start time, so sort chronologically
+    return os.path.join(reports_dir, new[-1])
+
+
+def _output_stream() -> TextIO:
+    """Where build progress should be printed; worker threads buffer their output."""
+    stream: Optional[TextIO] = getattr(_thread_output, "stream", None)
+    return sys.stderr if stream is None else stream
+
+
+class _CargoProcesses:
+    """Tracks running cargo processes, so that a parallel build can be cancelled."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._processes: Set[subprocess.Popen] = set()
+        self._cancelled = False
+
+    def start(
+        self, command: List[str], *, env: Dict[str, str], **kwargs: Any
+    ) -> subprocess.Popen:
+        with self._lock:
+            if self._cancelled:
+                raise CompileError("build cancelled after another extension failed")
+            process = popen_subprocess(command, env=env, **kwargs)
+            self._processes.add(process)
+            return process
+
+    def finish(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._processes.discard(process)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            for process in self._processes:
+                process.terminate()
+
+
+def _count_dependencies(metadata: CargoMetadata, package_ids: List[str]) -> int:
+    """Counts `package_ids` and their (recursive) normal and build dependencies.
+
+    >>> _count_dependencies(
+    ...     {"resolve": {"nodes": [
+    ...         {"id": "a", "deps": [
+    ...             {"pkg": "b", "dep_kinds": [{"kind": None}]},
+    ...             {"pkg": "c", "dep_kinds": [{"kind": "dev"}]},
+    ...         ]},
+    ...         {"id": "b", "deps": [{"pkg": "d", "dep_kinds": [{"kind": "build"}]}]},
+    ...     ]}},
+    ...     ["a"],
+    ... )
+    3
+    """
+    nodes = {node["id"]: node for node in metadata["resolve"]["nodes"]}
+    seen = set()
+    pending = list(package_ids)
+    while pending:
+        package_id = pending.pop()
+        if package_id in seen:
+            continue
+        seen.add(package_id)
+        for dep in nodes.get(package_id, {}).get("deps", []):
+            if any(kind["kind"] != "dev" for kind in dep["dep_kinds"]):
+                pending.append(dep["pkg"])
+    return len(seen)
+
+
+def _add_rustflags(env: Dict[str, str], rustflags: List[str], *, quiet: bool) -> None:
+    if rustflags:
+        existing_rustflags = env.get("RUSTFLAGS")
+        if existing_rustflags is not None:
+            rustflags = [*rustflags, existing_rustflags]
+        new_rustflags = " ".join(rustflags)
+        env["RUSTFLAGS"] = new_rustflags
+
+        # print RUSTFLAGS being added before the command
+        if not quiet:
+            print(f"[RUSTFLAGS={new_rustflags}]", end=" ", file=_output_stream())
+
+
 def _replace_vendor_with_unknown(target: str) -> Optional[str]:
     """Replaces vendor in the target triple with unknown.
 
@@ -714,14 +2057,29 @@ def _replace_vendor_with_unknown(target: str) -> Optional[str]:
     return "-".join(components)
 
 
-def _prepare_build_environment(env: Env, ext: RustExtension) -> Dict[str, str]:
-    """Prepares environment variables to use when executing cargo build."""
+def _prepare_build_environment(
+    env: Env,
+    ext: RustExtension,
+    compiler_cache: Optional[CompilerCache] = None,
+    python_executable: Optional[str] = None,
+    pyo3_abi3: Optional[bool] = None,
+) -> Dict[str, str]:
+    """Prepares environment variables to use when executing cargo build.
+
+    The build is for the running interpreter, unless `python_executable` is
+    given, which overrides any interpreter set in the environment.
+
+    If `pyo3_abi3` is given, pyo3 is configured for the running interpreter by
+    a ``PYO3_CONFIG_FILE`` with that ``abi3`` setting, unless the environment
+    configures pyo3 itself."""
 
     base_executable = None
     if os.getenv("SETUPTOOLS_RUST_PEP517_USE_BASE_PYTHON"):
         base_executable = getattr(sys, "_base_executable")
 
-    if base_executable and os.path.exists(base_executable):
+    if python_executable is not None:
+        executable = python_executable
+    elif base_executable and os.path.exists(base_executable):
         executable = os.path.realpath(base_executable)
     else:
         executable = sys.executable
@@ -741,13 +2099,41 @@ def _prepare_build_environment(env: Env, ext: RustExtension) -> Dict[str, str]:
             "PYO3_PYTHON": env_vars.get("PYO3_PYTHON", executable),
         }
     )
+    if python_executable is not None:
+        env_vars["PYTHON_SYS_EXECUTABLE"] = python_executable
+        env_vars["PYO3_PYTHON"] = python_executable
 
     if ext.binding == Binding.PyO3:
         env_vars.setdefault("PYO3_BUILD_EXTENSION_MODULE", "1")
+        if pyo3_abi3 is not None and not _configures_pyo3(env_vars, executable):
+            config = pyo3_config(executable, pyo3_abi3)
+            config_file = None if config is None else pyo3_config_file(config)
+            if config_file is not None:
+                env_vars["PYO3_CONFIG_FILE"] = config_file
+
+    if compiler_cache is not None:
+        compiler_cache.apply(env_vars)
 
     return env_vars
 
 
+def _configures_pyo3(env_vars: Dict[str, str], executable: str) -> bool:
+    """Whether `env_vars` choose pyo3's configuration, other than by setting
+    ``PYO3_PYTHON`` to `executable`.
+
+    >>> _configures_pyo3({"PYO3_PYTHON": "/usr/bin/python3"}, "/usr/bin/python3")
+    False
+    >>> _configures_pyo3({"PYO3_CROSS_LIB_DIR": "/sysroot/lib"}, "/usr/bin/python3")
+    True
+    """
+    return (
+        env_vars.get("PYO3_PYTHON", executable) != executable
+        or "PYO3_CONFIG_FILE" in env_vars
+        or "PYO3_NO_PYTHON" in env_vars
+        or any(key.startswith("PYO3_CROSS") for key in env_vars)
+    )
+
+
 def _is_py_limited_api(
     ext_setting: Literal["auto", True, False],
     wheel_setting: Optional[_PyLimitedApi],
@@ -802,10 +2188,9 @@ _PyLimitedApi = Literal["cp37", "cp38", "cp39", "cp310", "cp311", "cp312", True,
 def _override_cargo_default_target(plat_name: str, env: Env) -> Union[str, _Platform]:
     """Get a platform-specific override, if one is needed for correctness."""
     override: Union[str, _Platform] = _Platform.CARGO_DEFAULT
+    host = probe_toolchain(None, env)
     if plat_name in ("win32", "win-amd64"):
-        toolchain = (
-            "gnu" if get_rustc_cfgs(None, env).get("target_env") == "gnu" else "msvc"
-        )
+        toolchain = "gnu" if host.cfgs.get("target_env") == "gnu" else "msvc"
         # If we've got a 32-bit Python, we need to make sure Rust will build for a 32-bit target,
         # even though the host system may well be 64-bit.
         arch = "i686" if plat_name == "win32" else "x86_64"
@@ -815,7 +2200,7 @@ def _override_cargo_default_target(plat_name: str, env: Env) -> Union[str, _Plat
         if override is _Platform.CARGO_DEFAULT and platform.machine() == "x86_64":
             override = "x86_64-apple-darwin"
 
-    if isinstance(override, str) and override == get_rust_host(env):
+    if isinstance(override, str) and override == host.host:
         # If the override we asserted resolves to the same that `rustc` would do by default, we swap
         # back to specifying the `CARGO_DEFAULT` to avoid creating spurious specific-target
         # directories in the temporary build directory.
@@ -853,92 +2238,20 @@ def _split_platform_and_extension(ext_path: str) -> Tuple[str, str, str]:
     return (ext_path, platform_tag, extension)
 
 
-def _find_cargo_artifacts(
-    cargo_messages: List[str],
-    *,
-    package_id: str,
-    kinds: Set[str],
-) -> List[str]:
-    """Identifies cargo artifacts built for the given `package_id` from the
-    provided cargo_messages.
-
-    >>> _find_cargo_artifacts(
-    ...    [
-    ...        '{"some_irrelevant_message": []}',
-    ...        '{"reason":"compiler-artifact","package_id":"some_id","target":{"kind":["cdylib"]},"filenames":["/some/path/baz.so"]}',
-    ...        '{"reason":"compiler-artifact","package_id":"some_id","target":{"kind":["dylib", "rlib"]},"filenames":["/file/two/baz.dylib", "/file/two/baz.rlib"]}',
-    ...        '{"reason":"compiler-artifact","package_id":"some_other_id","target":{"kind":["cdylib"]},"filenames":["/not/this.so"]}',
-    ...    ],
-    ...    package_id="some_id",
-    ...    kinds={"cdylib", "dylib"},
-    ... )
-    ['/some/path/baz.so', '/file/two/baz.dylib']
-    >>> _find_cargo_artifacts(
-    ...    [
-    ...        '{"some_irrelevant_message": []}',
-    ...        '{"reason":"compiler-artifact","package_id":"some_id","target":{"kind":["cdylib"]},"filenames":["/some/path/baz.so"]}',
-    ...        '{"reason":"compiler-artifact","package_id":"some_id","target":{"kind":["cdylib", "rlib"]},"filenames":["/file/two/baz.dylib", "/file/two/baz.rlib"]}',
-    ...        '{"reason":"compiler-artifact","package_id":"some_other_id","target":{"kind":["cdylib"]},"filenames":["/not/this.so"]}',
-    ...    ],
-    ...    package_id="some_id",
-    ...    kinds={"rlib"},
-    ... )
-    ['/file/two/baz.rlib']
-    >>> _find_cargo_artifacts(
-    ...    [
-    ...        '{"some_irrelevant_message": []}',
-    ...        '{"reason": "compiler-artifact", "package_id": "some_id", "target": {"kind": ["bin"]}, "filenames":[], "executable": "/target/debug/some_exe"}'
-    ...    ],
-    ...    package_id="some_id",
-    ...    kinds={"bin"},
-    ... )
-    ['/target/debug/some_exe']
-    """
-    artifacts = []
-    for message in cargo_messages:
-        # only bother parsing messages that look like a match
-        if "compiler-artifact" in message and package_id in message:
-            parsed = json.loads(message)
-            # verify the message is correct
-            if (
-                parsed.get("reason") == "compiler-artifact"
-                and parsed.get("package_id") == package_id
-            ):
-                filenames = parsed["filenames"]
-                if not filenames and parsed.get("executable"):
-                    # Use parsed["executable"] as the filename when filenames are empty
-                    # See https://github.com/PyO3/maturin/issues/2370
-                    filenames = [parsed["executable"]]
-                for artifact_kind, filename in zip(parsed["target"]["kind"], filenames):
-                    if artifact_kind in kinds:
-                        artifacts.append(filename)
-    return artifacts
-
-
-def _find_cargo_out_dir(cargo_messages: List[str], package_id: str) -> Optional[Path]:
-    # Chances are that the line we're looking for will be the third-last line in the
-    # messages.  The last is the completion report, the penultimate is generally the
-    # build of the final artifact.
-    for messsage in reversed(cargo_messages):
-        if "build-script-executed" not in messsage or package_id not in messsage:
-            continue
-        parsed = json.loads(messsage)
-        if parsed.get("package_id") == package_id:
-            out_dir = parsed.get("out_dir")
-            return None if out_dir is None else Path(out_dir)
-    return None
-
-
-def _replace_cross_target_dir(path: str, ext: RustExtension, *, quiet: bool) -> str:
+def _replace_cross_target_dir(
+    path: str, ext: RustExtension, target_dir: Optional[str], *, quiet: bool
+) -> str:
     """Replaces target director from `cross` docker build with the correct
     local path.
 
     Cross artifact messages and metadata contain paths from inside the
     dockerfile; invoking `cargo metadata` we can work out the correct local
-    target directory.
+    target directory, unless the build was given `target_dir`.
     """
     cross_target_dir = ext._metadata(cargo="cross", quiet=quiet)["target_directory"]
-    local_target_dir = ext._metadata(cargo="cargo", quiet=quiet)["target_directory"]
+    local_target_dir = target_dir
+    if local_target_dir is None:
+        local_target_dir = ext._metadata(cargo="cargo", quiet=quiet)["target_directory"]
     return path.replace(cross_target_dir, local_target_dir)
 
 
@@ -1,12 +1,18 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 import logging
 from setuptools import Command, Distribution
 from setuptools.errors import PlatformError
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
+from ._utils import Env
 from .extension import RustExtension
 from .rustc_info import get_rust_version
 
+if TYPE_CHECKING:
+    from semantic_version import Version
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,15 +57,10 @@ class RustCommand(Command, ABC):
             logger.info("%s: no rust_extensions defined", self.get_command_name())
             return
 
+        self._preflight()
+
         all_optional = all(ext.optional for ext in self.extensions)
-        # Use the environment of the first non-optional extension, or the first optional
-        # extension if there is no non-optional extension.
-        env = None
-        for ext in self.extensions:
-            if ext.env:
-                env = ext.env
-                if not ext.optional:
-                    break
+        env = self._version_env()
         try:
             version = get_rust_version(env)
             if version is None:
@@ -97,22 +98,53 @@ class RustCommand(Command, ABC):
                 print(str(e))
                 return
 
+        self._run_for_extensions(version)
+
+    def _version_env(self) -> Optional[Env]:
+        """The environment used to check the Rust version for all extensions."""
+        # Use the environment of the first non-optional extension, or the first optional
+        # extension if there is no non-optional extension.
+        env = None
+        for ext in self.extensions:
+            if ext.env:
+                env = ext.env
+                if not ext.optional:
+                    break
+        return env
+
+    def _preflight(self) -> None:
+        """Hook run before the Rust version check.
+
+        Subclasses may override this to start the queries they will need up front."""
+
+    def _run_for_extensions(self, version: Version) -> None:  # type: ignore[no-any-unimported]
+        """Run the command for every extension, in order.
+
+        Subclasses may override this to schedule the extensions differently."""
         for ext in self.extensions:
             try:
-                rust_version = ext.get_rust_version()
-                if rust_version is not None and version not in rust_version:
-                    raise PlatformError(
-                        f"Rust {version} does not match extension requirement {rust_version}"
-                    )
-
+                self._check_rust_version(ext, version)
                 self.run_for_extension(ext)
             except Exception as e:
-                if not ext.optional:
-                    raise
-                else:
-                    command_name = self.get_command_name()
-                    print(f"{command_name}: optional Rust extension {ext.name} failed")
-                    print(str(e))
+                self._handle_extension_error(ext, e)
+
+    def _check_rust_version(  # type: ignore[no-any-unimported]
+        self, ext: RustExtension, version: Version
+    ) -> None:
+        rust_version = ext.get_rust_version()
+        if rust_version is not None and version not in rust_version:
+            raise PlatformError(
+                f"Rust {version} does not match extension requirement {rust_version}"
+            )
+
+    def _handle_extension_error(self, ext: RustExtension, e: Exception) -> None:
+        """Re-raise ``e`` for required extensions, report it for optional ones."""
+        if not ext.optional:
+            raise e
+        else:
+            command_name = self.get_command_name()
+            print(f"{command_name}: optional Rust extension {ext.name} failed")
+            print(str(e))
 
     @abstractmethod
     def run_for_extension(self, extension: RustExtension) -> None: ...
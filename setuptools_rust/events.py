@@ -0,0 +1,266 @@
+"""Structured events describing the progress of ``build_rust``.
+
+Any callable accepting a :class:`BuildEvent` can be registered as a sink with
+:meth:`build_rust.add_event_sink`, or events can be written as JSON lines to
+the file named by the ``SETUPTOOLS_RUST_EVENTS_FILE`` environment variable, or
+collected into a Chrome trace-event timing report with ``--timings-report``.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, TextIO, Tuple
+
+
+class EventKind(Enum):
+    """The kinds of :class:`BuildEvent`."""
+
+    BUILD_STARTED = "build-started"
+    """``build_rust`` starts; ``data["extensions"]`` is the number of extensions."""
+    PREFLIGHT = "preflight"
+    """The toolchain probes and ``cargo metadata`` queries made before building."""
+    PROBE = "probe"
+    """A rustc or cargo query made during the preflight, with the ``error`` if it
+    failed."""
+    METADATA = "metadata"
+    """``cargo metadata`` for an extension, made during the preflight, with the
+    ``error`` if it failed."""
+    CARGO_STARTED = "cargo-started"
+    """A cargo build starts; ``data`` has the ``command``, the ``target``, the names
+    of the ``extensions`` it builds, an estimate of the number of ``crates`` and a
+    ``cargo_run`` number identifying this cargo invocation."""
+    CRATE_FINISHED = "crate-finished"
+    """cargo run ``cargo_run`` reports a built (or ``fresh``) crate target for
+    ``package_id``."""
+    CARGO_FINISHED = "cargo-finished"
+    """cargo run ``cargo_run`` completes successfully."""
+    ARTIFACT_LOOKUP = "artifact-lookup"
+    """The built artifacts of an extension are looked up in cargo's messages."""
+    ARTIFACT_READY = "artifact-ready"
+    """The built artifact ``path`` for the extension module ``module`` is found."""
+    COPY = "copy"
+    """An artifact is copied from ``source`` to ``destination``."""
+    STRIP = "strip"
+    """An installed artifact at ``path`` is stripped."""
+    CHMOD = "chmod"
+    """An installed artifact at ``path`` is made executable."""
+    GENERATED_FILES = "generated-files"
+    """The ``generated_files`` of an extension are synced."""
+    EXTENSION_DONE = "extension-done"
+    """An extension is installed, or ``skipped`` because it is up to date."""
+    BUILD_FINISHED = "build-finished"
+    """``build_rust`` has finished with all extensions; ``data["compiler_cache"]``
+    has the ``hits`` and ``misses`` of the compiler cache during the build, if
+    one was used."""
+
+
+class BuildEvent(NamedTuple):
+    """Something which happened during a build.
+
+    Attributes:
+        kind: What happened.
+        timestamp: When it happened (or started), in seconds since the epoch.
+        duration: How long it took in seconds, for events covering a span of time.
+        extension: The name of the extension concerned, if any.
+        data: Further details, depending on the `kind`.
+    """
+
+    kind: EventKind
+    timestamp: float
+    duration: Optional[float]
+    extension: Optional[str]
+    data: Dict[str, Any]
+
+    def to_json(self) -> str:
+        """Serializes the event as a single line of JSON.
+
+        >>> BuildEvent(EventKind.COPY, 1.5, 0.25, "foo", {"source": "a"}).to_json()
+        '{"kind": "copy", "timestamp": 1.5, "duration": 0.25, "extension": "foo", "source": "a"}'
+        """
+        return json.dumps(
+            {
+                "kind": self.kind.value,
+                "timestamp": self.timestamp,
+                "duration": self.duration,
+                "extension": self.extension,
+                **self.data,
+            },
+            default=str,
+        )
+
+
+EventSink = Callable[[BuildEvent], None]
+
+
+class EventDispatcher:
+    """Sends events to every registered sink, one event at a time, so that
+    sinks need not be thread-safe."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sinks: List[EventSink] = []
+
+    def add_sink(self, sink: EventSink) -> None:
+        with self._lock:
+            self._sinks.append(sink)
+
+    def __bool__(self) -> bool:
+        return bool(self._sinks)
+
+    def emit(
+        self,
+        kind: EventKind,
+        extension: Optional[str] = None,
+        *,
+        timestamp: Optional[float] = None,
+        duration: Optional[float] = None,
+        **data: Any,
+    ) -> None:
+        if not self._sinks:
+            return
+        event = BuildEvent(
+            kind,
+            time.time() if timestamp is None else timestamp,
+            duration,
+            extension,
+            data,
+        )
+        with self._lock:
+            for sink in self._sinks:
+                sink(event)
+
+
+class JsonLinesSink:
+    """Appends each event as a line of JSON to the file at `path`."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __call__(self, event: BuildEvent) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(event.to_json() + "\n")
+
+
+class ProgressReporter:
+    """Prints a compact progress line such as ``crates 143/210, ext 2/5``.
+
+    On a terminal the line is updated in place; otherwise a line is printed
+    each time a cargo build or an extension finishes.
+
+    >>> import io
+    >>> out = io.StringIO()
+    >>> report = ProgressReporter(out)
+    >>> def event(kind, **data):
+    ...     report(BuildEvent(kind, 0.0, None, "foo", data))
+    >>> event(EventKind.BUILD_STARTED, extensions=2)
+    >>> event(EventKind.CARGO_STARTED, cargo_run=0, crates=3)
+    >>> event(EventKind.CRATE_FINISHED, cargo_run=0, package_id="a")
+    >>> event(EventKind.CRATE_FINISHED, cargo_run=0, package_id="a")
+    >>> event(EventKind.CARGO_FINISHED, cargo_run=0)
+    >>> event(EventKind.EXTENSION_DONE)
+    >>> print(out.getvalue(), end="")
+    crates 1/3, ext 0/2
+    crates 1/3, ext 1/2
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = sys.stderr if stream is None else stream
+        self.interactive = self.stream.isatty()
+        self.crates: Set[Tuple[int, str]] = set()
+        self.crates_total = 0
+        self.extensions = 0
+        self.extensions_total = 0
+
+    def __call__(self, event: BuildEvent) -> None:
+        if event.kind is EventKind.BUILD_STARTED:
+            self.extensions_total = event.data["extensions"]
+        elif event.kind is EventKind.CARGO_STARTED:
+            self.crates_total += event.data.get("crates") or 0
+        elif event.kind is EventKind.CRATE_FINISHED:
+            crate = (event.data["cargo_run"], event.data["package_id"])
+            if crate in self.crates:
+                return
+            self.crates.add(crate)
+            if self.interactive:
+                self._print()
+        elif event.kind in (EventKind.CARGO_FINISHED, EventKind.EXTENSION_DONE):
+            if event.kind is EventKind.EXTENSION_DONE:
+                self.extensions += 1
+            self._print(final=not self.interactive)
+        elif event.kind is EventKind.BUILD_FINISHED and self.interactive:
+            self.stream.write("\n")
+            self.stream.flush()
+
+    def _print(self, final: bool = False) -> None:
+        # The estimated number of crates to build is taken from the dependency
+        # graph, which can include dependencies only used on other platforms.
+        total = max(self.crates_total, len(self.crates))
+        line = f"crates {len(self.crates)}/{total}, ext {self.extensions}/{self.extensions_total}"
+        self.stream.write(line + "\n" if final else f"\r{line}")
+        self.stream.flush()
+
+
+class ChromeTraceSink:
+    """Collects events into a timing report in the Chrome trace-event format,
+    viewable in ``chrome://tracing`` or https://ui.perfetto.dev, and writes it to
+    `path` when the build finishes.
+
+    Timed events become complete (``"X"``) events and others instant (``"i"``)
+    events, on a track for the thread which emitted them.
+
+    >>> sink = ChromeTraceSink("timings.json")
+    >>> sink(BuildEvent(EventKind.COPY, 1.5, 0.25, "foo", {"source": "a"}))
+    >>> {k: v for k, v in sink.events[-1].items() if k not in ("pid", "tid")}
+    {'name': 'copy foo', 'cat': 'copy', 'ph': 'X', 'ts': 1500000, 'args': {'source': 'a'}, 'dur': 250000}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.events: List[Dict[str, Any]] = []
+        self._pid = os.getpid()
+        # small, stable track numbers for the threads seen so far
+        self._threads: Dict[int, int] = {}
+
+    def __call__(self, event: BuildEvent) -> None:
+        tid = self._threads.get(threading.get_ident())
+        if tid is None:
+            tid = self._threads[threading.get_ident()] = len(self._threads) + 1
+            self.events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": {"name": threading.current_thread().name},
+                }
+            )
+
+        name = event.kind.value
+        if event.extension is not None:
+            name += f" {event.extension}"
+        trace_event: Dict[str, Any] = {
+            "name": name,
+            "cat": event.kind.value,
+            "ph": "i" if event.duration is None else "X",
+            "ts": round(event.timestamp * 1e6),
+            "pid": self._pid,
+            "tid": tid,
+            "args": event.data,
+        }
+        if event.duration is None:
+            trace_event["s"] = "t"
+        else:
+            trace_event["dur"] = round(event.duration * 1e6)
+        self.events.append(trace_event)
+
+        if event.kind is EventKind.BUILD_FINISHED:
+            self.write()
+
+    def write(self) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"traceEvents": self.events, "displayTimeUnit": "ms"}, f, default=str
+            )
@@ -24,7 +24,15 @@ from typing import (
 if TYPE_CHECKING:
     from semantic_version import SimpleSpec
 
+from ._cache import (
+    DiskCache,
+    cache_enabled,
+    cargo_config_paths,
+    files_digests,
+    key_digest,
+)
 from ._utils import check_subprocess_output, format_called_process_error, Env
+from .rustc_info import get_cargo_version
 
 
 class Binding(IntEnum):
@@ -53,15 +61,25 @@ class Strip(IntEnum):
     """
     Enumeration of modes for stripping symbols from the built extension.
 
+    Release builds are stripped by rustc as they are linked (using cargo's
+    ``strip`` profile setting) with Rust 1.59 or newer, or with the ``strip``
+    tool after installation with older versions. Debug builds and Windows
+    builds are not stripped.
+
     Attributes:
         No: Do not strip symbols.
         Debug: Strip debug symbols.
         All: Strip all symbols.
+        Split: Build with full debug info, and move it out of the extension into a
+            separate file collected by ``build_rust --split-debug-dir``: an ELF
+            ``.debug`` file linked by a GNU debuglink (using ``objcopy``), a
+            ``.dSYM`` bundle on macOS, or a ``.pdb`` file on Windows.
     """
 
     No = auto()
     Debug = auto()
     All = auto()
+    Split = auto()
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}.{self.name}"
@@ -124,6 +142,10 @@ class RustExtension:
             If this is populated, the built extension must have a build script
             that populates its ``OUT_DIR``. Only the output of the build script
             of the extension itself will be searched for data files.
+        cargo_timings: Pass ``--timings`` to cargo with these report formats
+            (``"html"``, ``"json"`` or ``"html,json"``), overriding the
+            ``build_rust --cargo-timings`` option. Formats other than
+            ``"html"`` require a nightly toolchain.
     """
 
     def __init__(
@@ -145,6 +167,7 @@ class RustExtension:
         py_limited_api: Literal["auto", True, False] = "auto",
         env: Optional[Dict[str, str]] = None,
         generated_files: Optional[Dict[str, str]] = None,
+        cargo_timings: Optional[str] = None,
     ):
         if isinstance(target, dict):
             name = "; ".join("%s=%s" % (key, val) for key, val in target.items())
@@ -169,6 +192,7 @@ class RustExtension:
         self.py_limited_api = py_limited_api
         self.env = Env(env)
         self.generated_files = generated_files or {}
+        self.cargo_timings = cargo_timings
 
         if self.generated_files and len(self.target) > 1:
             raise ValueError(
@@ -266,6 +290,36 @@ class RustExtension:
 
     @lru_cache()
     def _metadata(self, cargo: str, quiet: bool) -> "CargoMetadata":
+        cache_key = self._metadata_cache_key(cargo)
+        if cache_key is not None:
+            cached = _load_cached_metadata(cache_key)
+            if cached is not None:
+                return cached
+
+        metadata = self._run_metadata(cargo, quiet)
+        if cache_key is not None:
+            _store_cached_metadata(cache_key, metadata)
+        return metadata
+
+    def _metadata_cache_key(self, cargo: str) -> Optional[str]:
+        """Key for this extension's entry in the persistent metadata cache, or
+        `None` if the cache should not be used."""
+        if not cache_enabled("SETUPTOOLS_RUST_METADATA_CACHE"):
+            return None
+        cargo_version = get_cargo_version(cargo, self.env)
+        if cargo_version is None:
+            return None
+        env = self.env.env or os.environ
+        return key_digest(
+            os.path.abspath(self.path),
+            self.cargo_manifest_args,
+            cargo,
+            cargo_version,
+            os.getcwd(),
+            {k: v for k, v in env.items() if k.startswith(("CARGO", "RUST"))},
+        )
+
+    def _run_metadata(self, cargo: str, quiet: bool) -> "CargoMetadata":
         metadata_command = [
             cargo,
             "metadata",
@@ -326,6 +380,9 @@ class RustBin(RustExtension):
         optional: If it is true, a build failure in the bin will not
             abort the build process, and instead simply not install the failing
             bin.
+        cargo_timings: Pass ``--timings`` to cargo with these report formats
+            (``"html"``, ``"json"`` or ``"html,json"``), overriding the
+            ``build_rust --cargo-timings`` option.
     """
 
     def __init__(
@@ -341,6 +398,7 @@ class RustBin(RustExtension):
         strip: Strip = Strip.No,
         optional: bool = False,
         env: Optional[dict[str, str]] = None,
+        cargo_timings: Optional[str] = None,
     ):
         super().__init__(
             target=target,
@@ -356,6 +414,7 @@ class RustBin(RustExtension):
             strip=strip,
             py_limited_api=False,
             env=env,
+            cargo_timings=cargo_timings,
         )
 
     def entry_points(self) -> List[str]:
@@ -364,6 +423,35 @@ class RustBin(RustExtension):
 
 CargoMetadata = NewType("CargoMetadata", Dict[str, Any])
 
+# Cargo metadata of large workspaces runs to megabytes; keep a bounded amount.
+_METADATA_CACHE = DiskCache("metadata", max_bytes=64 * 1024 * 1024)
+
+
+def _load_cached_metadata(cache_key: str) -> Optional[CargoMetadata]:
+    entry = _METADATA_CACHE.get(cache_key)
+    if entry is None:
+        return None
+    # The entry is only valid if none of the manifests it was resolved from changed.
+    if files_digests(list(entry["inputs"])) != entry["inputs"]:
+        return None
+    return cast(CargoMetadata, entry["metadata"])
+
+
+def _store_cached_metadata(cache_key: str, metadata: CargoMetadata) -> None:
+    inputs = [
+        os.path.join(metadata["workspace_root"], "Cargo.toml"),
+        os.path.join(metadata["workspace_root"], "Cargo.lock"),
+        *(
+            package["manifest_path"]
+            for package in metadata["packages"]
+            if package["source"] is None
+        ),
+        *cargo_config_paths(),
+    ]
+    _METADATA_CACHE.put(
+        cache_key, {"inputs": files_digests(inputs), "metadata": metadata}
+    )
+
 
 def _script_name(executable: str) -> str:
     """Generates the name of the installed Python script for an executable.
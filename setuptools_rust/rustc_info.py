@@ -1,11 +1,25 @@
 from __future__ import annotations
 
 import os
+import shutil
 import subprocess
+from pathlib import Path
+from types import MappingProxyType
 from setuptools.errors import PlatformError
 from functools import lru_cache
-from typing import Dict, List, NewType, Optional, TYPE_CHECKING
-
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    NewType,
+    Optional,
+    TYPE_CHECKING,
+    Union,
+)
+
+from ._cache import DiskCache, cache_enabled, files_digests, key_digest
 from ._utils import Env, check_subprocess_output
 
 if TYPE_CHECKING:
@@ -18,7 +32,7 @@ def get_rust_version(env: Optional[Env]) -> Optional[Version]:  # type: ignore[n
         # rustc 1.61.0 (fe5b13d68 2022-05-18)
         from semantic_version import Version
 
-        return Version(_rust_version(env).split(" ")[1])
+        return Version(_rust_version_verbose(env).split(" ")[1])
     except (subprocess.CalledProcessError, OSError):
         return None
 
@@ -39,6 +53,47 @@ def get_rust_host(env: Optional[Env]) -> str:
 RustCfgs = NewType("RustCfgs", Dict[str, Optional[str]])
 
 
+class ToolchainInfo(NamedTuple):
+    """Snapshot of the Rust toolchain used for a build.
+
+    Attributes:
+        version_verbose: Output of ``rustc -Vv``, identifying the exact toolchain.
+        host: The host target triple, which cargo builds for by default.
+        target: The target triple `cfgs` describe; `None` for the host.
+        cfgs: The ``cfg`` values rustc sets when compiling for `target`.
+    """
+
+    version_verbose: str
+    host: str
+    target: Optional[str]
+    cfgs: Mapping[str, Optional[str]]
+
+    @property
+    def version(self) -> Optional[Version]:  # type: ignore[no-any-unimported]
+        """The rustc version, or `None` if it could not be parsed."""
+        from semantic_version import Version
+
+        try:
+            return Version(self.version_verbose.split(" ")[1])
+        except (IndexError, ValueError):
+            return None
+
+
+def probe_toolchain(target_triple: Optional[str], env: Env) -> ToolchainInfo:
+    """Queries everything setuptools-rust needs to know about the toolchain.
+
+    This takes two rustc invocations (``rustc -Vv`` and ``rustc --print cfg``),
+    which are shared with the other functions of this module and cached. They
+    can't be merged: ``rustc -Vv --print cfg`` succeeds, but prints only the
+    version, silently dropping the cfgs."""
+    return ToolchainInfo(
+        version_verbose=_rust_version_verbose(env),
+        host=get_rust_host(env),
+        target=target_triple,
+        cfgs=MappingProxyType(get_rustc_cfgs(target_triple, env)),
+    )
+
+
 def _is_custom_target(target: str) -> bool:
     if target.endswith(".json"):
         return True
@@ -71,23 +126,110 @@ def get_rust_target_info(target_triple: Optional[str], env: Env) -> List[str]:
         if _is_custom_target(target_triple):
             cmd.extend(["-Z", "unstable-options"])
         cmd.extend(["--target", target_triple.split(".")[0]])
-    output = check_subprocess_output(cmd, env=env, text=True)
+    if target_triple and _is_custom_target(target_triple):
+        # The target spec file may change without the toolchain changing.
+        output = check_subprocess_output(cmd, env=env, text=True)
+    else:
+        output = _toolchain_output(cmd, env)
     return output.splitlines()
 
 
 @lru_cache()
 def get_rust_target_list(env: Env) -> List[str]:
-    output = check_subprocess_output(
-        ["rustc", "--print", "target-list"], env=env, text=True
-    )
+    output = _toolchain_output(["rustc", "--print", "target-list"], env)
     return output.splitlines()
 
 
 @lru_cache()
-def _rust_version(env: Env) -> str:
-    return check_subprocess_output(["rustc", "-V"], env=env, text=True)
+def get_cargo_version(cargo: str, env: Env) -> Optional[str]:
+    try:
+        return _toolchain_output([cargo, "-V"], env).strip()
+    except (subprocess.CalledProcessError, OSError):
+        return None
 
 
 @lru_cache()
 def _rust_version_verbose(env: Env) -> str:
-    return check_subprocess_output(["rustc", "-Vv"], env=env, text=True)
+    return _toolchain_output(["rustc", "-Vv"], env)
+
+
+_TOOLCHAIN_CACHE = DiskCache("toolchain", max_bytes=4 * 1024 * 1024)
+
+
+def _toolchain_output(command: List[str], env: Optional[Env]) -> str:
+    """Runs a toolchain query, reusing its output from the persistent toolchain
+    cache when the toolchain hasn't changed since it was last run."""
+    cache_key = _toolchain_cache_key(command, env)
+    if cache_key is not None:
+        cached = _TOOLCHAIN_CACHE.get(cache_key)
+        if isinstance(cached, str):
+            return cached
+
+    output = check_subprocess_output(command, env=env, text=True)
+    if cache_key is not None:
+        _TOOLCHAIN_CACHE.put(cache_key, output)
+    return output
+
+
+def _toolchain_cache_key(command: List[str], env: Optional[Env]) -> Optional[str]:
+    if not cache_enabled("SETUPTOOLS_RUST_TOOLCHAIN_CACHE"):
+        return None
+    environ = os.environ if env is None or env.env is None else env.env
+    executable = shutil.which(command[0], path=environ.get("PATH"))
+    if executable is None:
+        return None
+    executable = os.path.realpath(executable)
+
+    # The executable is usually a rustup proxy, which picks a toolchain based on
+    # rustup's settings, toolchain files and environment, so all of these are
+    # part of the key, along with the installed toolchains themselves.
+    rustup_home = Path(environ.get("RUSTUP_HOME") or os.path.expanduser("~/.rustup"))
+    cwd = Path.cwd()
+    toolchain_files = [
+        str(directory / name)
+        for directory in (cwd, *cwd.parents)
+        for name in ("rust-toolchain", "rust-toolchain.toml")
+    ]
+    return key_digest(
+        command,
+        executable,
+        _stat_key(executable),
+        {
+            key: value
+            for key, value in environ.items()
+            if key.startswith("RUSTUP_") or key in ("RUSTC", "RUST_TARGET_PATH")
+        },
+        _stat_key(rustup_home / "settings.toml"),
+        _rustup_toolchains_key(rustup_home, os.path.basename(executable)),
+        files_digests(toolchain_files),
+    )
+
+
+def _rustup_toolchains_key(rustup_home: Path, tool: str) -> List[Any]:
+    """The state of each toolchain installed by rustup, which changes when one
+    is installed, updated or removed.
+
+    Updating a toolchain in place needn't touch the ``toolchains`` directory, but
+    rewrites its file in ``update-hashes`` and replaces its executables; the
+    executable `tool` also covers toolchains linked with ``rustup toolchain
+    link``, which have no update hash."""
+    try:
+        names = sorted(os.listdir(rustup_home / "toolchains"))
+    except OSError:
+        return []
+    return [
+        [
+            name,
+            _stat_key(rustup_home / "update-hashes" / name),
+            _stat_key(rustup_home / "toolchains" / name / "bin" / tool),
+        ]
+        for name in names
+    ]
+
+
+def _stat_key(path: Union[str, Path]) -> Optional[List[Any]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
@@ -1,44 +1,64 @@
+"""Integration of setuptools-rust into setuptools.
+
+setuptools imports this module for every project through the
+`pyprojecttoml_config` hook, so the rest of setuptools-rust (and the setuptools
+commands it extends) is only imported once a project turns out to use it.
+"""
+
+from __future__ import annotations
+
 import logging
 import os
 import sys
 import sysconfig
 from functools import partial
-from typing import List, Literal, Optional, Set, Tuple, Type, TypeVar, cast
-
-from setuptools.command.build_ext import build_ext
-from setuptools.command.install import install
-from setuptools.command.install_lib import install_lib
-from setuptools.command.install_scripts import install_scripts
-from setuptools.command.sdist import sdist
-from setuptools.dist import Distribution
-
-from ._utils import Env, run_subprocess
-from .build import _get_bdist_wheel_cmd, _Platform
-from .extension import Binding, RustBin, RustExtension, Strip
-
-try:
-    from setuptools.command.bdist_wheel import bdist_wheel
-except ImportError:
-    try:  # old version of setuptools
-        from wheel.bdist_wheel import bdist_wheel  # type: ignore[no-redef]
-    except ImportError:
-        bdist_wheel = None  # type: ignore[assignment,misc]
-
-if sys.version_info[:2] >= (3, 11):
-    from tomllib import load as toml_load
-else:
-    try:
-        from tomli import load as toml_load
-    except ImportError:
-        from setuptools.extern.tomli import load as toml_load
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
+
+if TYPE_CHECKING:
+    from setuptools.dist import Distribution
+
+    from ._utils import Env
+    from .extension import RustExtension
 
 
 logger = logging.getLogger(__name__)
 
-T = TypeVar("T", bound=RustExtension)
+T = TypeVar("T", bound="RustExtension")
 
 
 def add_rust_extension(dist: Distribution) -> None:
+    from setuptools.command.build_ext import build_ext
+    from setuptools.command.install import install
+    from setuptools.command.install_lib import install_lib
+    from setuptools.command.install_scripts import install_scripts
+    from setuptools.command.sdist import sdist
+
+    from setuptools.errors import SetupError
+
+    from ._utils import run_subprocess
+    from .build import _get_bdist_wheel_cmd, _Platform
+    from .extension import RustBin
+
+    try:
+        from setuptools.command.bdist_wheel import bdist_wheel
+    except ImportError:
+        try:  # old version of setuptools
+            from wheel.bdist_wheel import bdist_wheel  # type: ignore[no-redef]
+        except ImportError:
+            bdist_wheel = None  # type: ignore[assignment,misc]
+
     sdist_base_class = cast(Type[sdist], dist.cmdclass.get("sdist", sdist))
     sdist_options = sdist_base_class.user_options.copy()
     sdist_boolean_options = sdist_base_class.boolean_options.copy()
@@ -51,6 +71,18 @@ def add_rust_extension(dist: Distribution) -> None:
                 None,
                 "don't vendor Rust crates. [default; enable with --vendor-crates]",
             ),
+            (
+                "vendor-platforms=",
+                None,
+                "comma-separated target triples to vendor Rust crates for; crates "
+                + "not needed on any of them are replaced by empty stubs",
+            ),
+            (
+                "vendor-format=",
+                None,
+                "how to vendor Rust crates: 'directory' (default: 'cargo vendor') "
+                + "or 'local-registry' (crates.io's .crate archives and an index)",
+            ),
         ]
     )
     sdist_boolean_options.append("vendor-crates")
@@ -83,6 +115,18 @@ def add_rust_extension(dist: Distribution) -> None:
         def initialize_options(self) -> None:
             super().initialize_options()
             self.vendor_crates = 0
+            self.vendor_platforms: Optional[str] = None
+            self.vendor_format = "directory"
+
+        def finalize_options(self) -> None:
+            super().finalize_options()
+            from ._vendor import VENDOR_FORMATS
+
+            if self.vendor_format not in VENDOR_FORMATS:
+                raise SetupError(
+                    f"vendor-format must be one of {', '.join(VENDOR_FORMATS)}, "
+                    f"not {self.vendor_format!r}"
+                )
 
         def make_distribution(self) -> None:
             if self.vendor_crates:
@@ -118,22 +162,14 @@ def add_rust_extension(dist: Distribution) -> None:
                     self.mkpath(dot_cargo_path)
                     cargo_config_path = os.path.join(dot_cargo_path, "config.toml")
                     vendor_path = os.path.join(dot_cargo_path, "vendor")
-                    command = ["cargo", "vendor"]
-                    if cargo_manifest_args:
-                        command.extend(sorted(cargo_manifest_args))
-                    # additional Cargo.toml for extension 1..n
-                    for extra_path in manifest_paths[1:]:
-                        command.append("--sync")
-                        command.append(extra_path)
-                    # `cargo vendor --sync` accepts multiple values, for example
-                    # `cargo vendor --sync a --sync b --sync c vendor_path`
-                    # but it would also consider vendor_path as --sync value
-                    # set --manifest-path before vendor_path and after --sync to workaround that
-                    # See https://docs.rs/clap/latest/clap/struct.Arg.html#method.multiple for detail
-                    command.extend(["--manifest-path", manifest_paths[0], vendor_path])
-                    run_subprocess(command, env=env, check=True)
-
-                    cargo_config = _CARGO_VENDOR_CONFIG
+                    self._vendor_crates(
+                        vendor_path, manifest_paths, cargo_manifest_args, env
+                    )
+
+                    if self.vendor_format == "local-registry":
+                        cargo_config = _CARGO_LOCAL_REGISTRY_CONFIG
+                    else:
+                        cargo_config = _CARGO_VENDOR_CONFIG
 
                     # Check whether `.cargo/config`/`.cargo/config.toml` already exists
                     existing_cargo_config = None
@@ -158,6 +194,83 @@ def add_rust_extension(dist: Distribution) -> None:
 
             super().make_distribution()
 
+        def _vendor_crates(
+            self,
+            vendor_path: str,
+            manifest_paths: List[str],
+            cargo_manifest_args: Set[str],
+            env: Optional[Env],
+        ) -> None:
+            from pathlib import Path
+
+            from ._vendor import (
+                platform_packages,
+                prune_vendored_crates,
+                restore_vendor_cache,
+                store_vendor_cache,
+                vendor_cache_key,
+                vendor_local_registry,
+                vendor_platforms,
+            )
+
+            platforms = None
+            if self.vendor_platforms:
+                platforms = vendor_platforms(self.vendor_platforms)
+
+            cache_key = vendor_cache_key(
+                manifest_paths,
+                sorted(cargo_manifest_args),
+                platforms,
+                env,
+                self.vendor_format,
+            )
+            if cache_key is not None and restore_vendor_cache(
+                cache_key, Path(vendor_path)
+            ):
+                logger.info("vendored crates restored from the vendor cache")
+                return
+
+            if self.vendor_format == "local-registry":
+                vendor_local_registry(
+                    Path(vendor_path),
+                    manifest_paths,
+                    sorted(cargo_manifest_args),
+                    platforms,
+                    env,
+                )
+                if cache_key is not None:
+                    store_vendor_cache(cache_key, Path(vendor_path))
+                return
+
+            command = ["cargo", "vendor"]
+            if cargo_manifest_args:
+                command.extend(sorted(cargo_manifest_args))
+            # additional Cargo.toml for extension 1..n
+            for extra_path in manifest_paths[1:]:
+                command.append("--sync")
+                command.append(extra_path)
+            # `cargo vendor --sync` accepts multiple values, for example
+            # `cargo vendor --sync a --sync b --sync c vendor_path`
+            # but it would also consider vendor_path as --sync value
+            # set --manifest-path before vendor_path and after --sync to workaround that
+            # See https://docs.rs/clap/latest/clap/struct.Arg.html#method.multiple for detail
+            command.extend(["--manifest-path", manifest_paths[0], vendor_path])
+            run_subprocess(command, env=env, check=True)
+
+            if platforms is not None:
+                keep = platform_packages(
+                    manifest_paths, platforms, sorted(cargo_manifest_args), env
+                )
+                pruned = prune_vendored_crates(Path(vendor_path), keep)
+                logger.info(
+                    "replaced %d vendored crates not needed on %s with stubs",
+                    len(pruned),
+                    ", ".join(platforms),
+                )
+
+            if cache_key is not None:
+                store_vendor_cache(cache_key, Path(vendor_path))
+
     dist.cmdclass["sdist"] = sdist_rust_extension
 
     build_ext_base_class = cast(
@@ -317,18 +430,64 @@ def rust_extensions(
 def pyprojecttoml_config(dist: Distribution) -> None:
     try:
         with open("pyproject.toml", "rb") as f:
-            cfg = toml_load(f).get("tool", {}).get("setuptools-rust")
+            content = f.read()
     except FileNotFoundError:
         return None
 
+    # This hook runs for every project; most don't mention setuptools-rust at all.
+    if b"setuptools-rust" not in content:
+        return None
+
+    cfg = _load_toml(content).get("tool", {}).get("setuptools-rust")
     if cfg:
+        from .extension import RustBin, RustExtension
+
         modules = map(partial(_create, RustExtension), cfg.get("ext-modules", []))
         binaries = map(partial(_create, RustBin), cfg.get("bins", []))
         dist.rust_extensions = [*modules, *binaries]  # type: ignore[attr-defined]
         rust_extensions(dist, "rust_extensions", dist.rust_extensions)  # type: ignore[attr-defined]
+        _set_build_rust_options(dist, cfg)
+
+
+# Keys of `[tool.setuptools-rust]` which configure the `build_rust` command.
+# Command line options and `setup.cfg` take precedence over these.
+_BUILD_RUST_OPTIONS = (
+    "parallel",
+    "batch-workspaces",
+    "skip-unchanged",
+    "progress",
+    "install-strategy",
+    "split-debug-dir",
+    "timings-report",
+    "cargo-timings",
+    "cargo-timings-dir",
+    "compiler-cache",
+    "compiler-cache-dir",
+    "target-cache",
+)
+
+
+def _set_build_rust_options(dist: Distribution, config: dict) -> None:
+    options = dist.get_option_dict("build_rust")
+    for key in _BUILD_RUST_OPTIONS:
+        if key in config:
+            options[key.replace("-", "_")] = ("pyproject.toml", config[key])
+
+
+def _load_toml(content: bytes) -> Dict[str, Any]:
+    if sys.version_info[:2] >= (3, 11):
+        from tomllib import loads as toml_loads
+    else:
+        try:
+            from tomli import loads as toml_loads
+        except ImportError:
+            from setuptools.extern.tomli import loads as toml_loads
+    return toml_loads(content.decode())
 
 
 def _create(constructor: Type[T], config: dict) -> T:
+    from .extension import Binding, Strip
+
     kwargs = {
         # PEP 517/621 convention: pyproject.toml uses dashes
         k.replace("-", "_"): v
@@ -348,3 +507,11 @@ replace-with = "vendored-sources"
 [source.vendored-sources]
 directory = ".cargo/vendor"
 """
+
+_CARGO_LOCAL_REGISTRY_CONFIG = b"""
+[source.crates-io]
+replace-with = "vendored-sources"
+
+[source.vendored-sources]
+local-registry = ".cargo/vendor"
+"""
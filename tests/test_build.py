@@ -1,7 +1,27 @@
+import json
+import os
+import sys
+import threading
+from pathlib import Path
 from unittest import mock
 
-from setuptools_rust.build import _override_cargo_default_target
+import pytest
+from semantic_version import Version
+from setuptools import Distribution
+from setuptools.errors import CompileError, ExecError, SetupError
+
+from setuptools_rust import Binding, RustExtension, Strip
+from setuptools_rust.build import (
+    _cargo_timing_reports,
+    _new_cargo_timing_report,
+    _override_cargo_default_target,
+    _prepare_build_environment,
+    _replace_cross_target_dir,
+    build_rust,
+)
+from setuptools_rust._cargo_messages import CargoMessageIndex
 from setuptools_rust._utils import Env
+from setuptools_rust.rustc_info import ToolchainInfo
 
 
 NO_ENV = Env(None)
@@ -36,3 +56,370 @@ def test_adjusted_local_rust_target_macos():
         assert (
             _override_cargo_default_target("macosx-", NO_ENV) == "x86_64-apple-darwin"
         )
+
+
+def _parallel_build_rust(extensions, monkeypatch, build):
+    cmd = build_rust(Distribution())
+    cmd.initialize_options()
+    cmd.extensions = extensions
+    cmd.parallel = 2
+    cmd.plat_name = "linux-x86_64"
+    cmd.target = "x86_64-unknown-linux-gnu"
+    installed = []
+    monkeypatch.setattr(cmd, "build_extension", build)
+    monkeypatch.setattr(
+        cmd, "install_extension", lambda ext, *_args: installed.append(ext.name)
+    )
+    return cmd, installed
+
+
+def test_parallel_build_optional_failure(monkeypatch, capsys):
+    def build(ext):
+        if ext.name == "broken":
+            raise CompileError("broken build")
+        return [], None
+
+    extensions = [
+        RustExtension("ok"),
+        RustExtension("broken", optional=True),
+        RustExtension("also_ok"),
+    ]
+    cmd, installed = _parallel_build_rust(extensions, monkeypatch, build)
+    cmd._run_for_extensions(Version("1.80.0"))
+
+    assert sorted(installed) == ["also_ok", "ok"]
+    assert "optional Rust extension broken failed" in capsys.readouterr().out
+
+
+def test_parallel_build_required_failure_cancels(monkeypatch):
+    def build(ext):
+        if ext.name == "broken":
+            raise CompileError("broken build")
+        return [], None
+
+    extensions = [RustExtension("broken"), RustExtension("ok")]
+    cmd, installed = _parallel_build_rust(extensions, monkeypatch, build)
+    with pytest.raises(CompileError, match="broken build"):
+        cmd._run_for_extensions(Version("1.80.0"))
+
+    with pytest.raises(CompileError, match="cancelled"):
+        cmd._cargo_processes.start(["cargo"], env={})
+
+
+def test_plan_build_jobs_groups_by_workspace(monkeypatch):
+    cmd = build_rust(Distribution())
+    cmd.initialize_options()
+    extensions = [
+        RustExtension("ws1_a"),
+        RustExtension("alone"),
+        RustExtension("ws2_a"),
+        RustExtension("ws1_b"),
+    ]
+    monkeypatch.setattr(
+        cmd,
+        "_workspace_batch_key",
+        lambda ext: None if ext.name == "alone" else ext.name.split("_")[0],
+    )
+
+    assert cmd._plan_build_jobs(extensions) == [[ext] for ext in extensions]
+
+    cmd.batch_workspaces = True
+    assert [[ext.name for ext in job] for job in cmd._plan_build_jobs(extensions)] == [
+        ["ws1_a", "ws1_b"],
+        ["alone"],
+        ["ws2_a"],
+    ]
+
+
+def _workspace_build(monkeypatch, tmp_path, artifact_packages):
+    """Builds extensions "a" and "b" from one workspace with a stubbed cargo,
+    which reports a cdylib for each of `artifact_packages`."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CARGO", raising=False)
+    cmd = build_rust(Distribution())
+    cmd.initialize_options()
+    cmd.batch_workspaces = True
+    cmd._target_cache_root = None
+    toolchain = ToolchainInfo("rustc 1.80.0 (051478957 2024-07-21)", "host", None, {})
+    monkeypatch.setattr(cmd, "_toolchain", lambda ext: toolchain)
+
+    packages = [
+        {"name": "b", "id": "b 0.1.0", "targets": [{"kind": ["cdylib"]}]},
+        # a binary next to the extension module, which the build must leave out
+        {
+            "name": "a",
+            "id": "a 0.1.0",
+            "targets": [{"kind": ["cdylib"]}, {"kind": ["bin"]}],
+        },
+    ]
+    exts = []
+    for name in ("a", "b"):
+        ext = RustExtension(name, f"{name}/Cargo.toml", binding=Binding.NoBinding)
+        metadata = {
+            "workspace_root": str(tmp_path),
+            "target_directory": str(tmp_path / "target"),
+            "packages": packages,
+            "resolve": {"root": f"{name} 0.1.0", "nodes": []},
+        }
+        monkeypatch.setattr(ext, "metadata", lambda quiet, metadata=metadata: metadata)
+        exts.append(ext)
+
+    commands = []
+
+    def run_cargo(command, env, *, quiet, cargo_run):
+        commands.append(command)
+        messages = CargoMessageIndex()
+        for name in artifact_packages:
+            messages.add_line(
+                json.dumps(
+                    {
+                        "reason": "compiler-artifact",
+                        "package_id": f"{name} 0.1.0",
+                        "target": {"kind": ["cdylib"]},
+                        "filenames": [f"/target/release/lib{name}.so"],
+                    }
+                )
+            )
+        return messages
+
+    monkeypatch.setattr(cmd, "_run_cargo", run_cargo)
+    return commands, lambda: cmd.build_workspace(exts)
+
+
+def test_build_workspace(monkeypatch, tmp_path):
+    commands, build = _workspace_build(monkeypatch, tmp_path, ["b", "a"])
+    results = build()
+
+    [command] = commands
+    assert command[:5] == [
+        "cargo",
+        "build",
+        "--message-format=json-render-diagnostics",
+        "--manifest-path",
+        os.path.join(str(tmp_path), "Cargo.toml"),
+    ]
+    assert command[5:10] == ["-p", "a", "-p", "b", "--lib"]
+    assert "--release" in command[10:]
+
+    # each extension gets the artifact of its own package
+    assert [[tuple(m) for m in modules] for modules, _ in results] == [
+        [("a", "/target/release/liba.so")],
+        [("b", "/target/release/libb.so")],
+    ]
+
+
+def test_build_workspace_missing_artifact(monkeypatch, tmp_path):
+    commands, build = _workspace_build(monkeypatch, tmp_path, ["a"])
+    with pytest.raises(ExecError, match="unable to find any cdylib"):
+        build()
+    assert len(commands) == 1
+
+
+def test_preflight_queries_concurrently(monkeypatch, tmp_path):
+    manifest = tmp_path / "Cargo.toml"
+    manifest.touch()
+    cmd = build_rust(Distribution())
+    cmd.initialize_options()
+    cmd.extensions = [
+        RustExtension("a", path=str(manifest)),
+        RustExtension("b", path=str(manifest), optional=True),
+        RustExtension("missing", path=str(tmp_path / "missing.toml")),
+    ]
+    cmd.plat_name = "linux-x86_64"
+    cmd.target = "x86_64-unknown-linux-gnu"
+
+    barrier = threading.Barrier(4, timeout=10)
+    probed = []
+
+    def probe(name):
+        probed.append(name)
+        barrier.wait()
+        if name == "b":
+            raise SetupError("cargo metadata failed")
+
+    monkeypatch.setattr(
+        "setuptools_rust.build.get_rust_version", lambda _env: probe("version")
+    )
+    monkeypatch.setattr(
+        "setuptools_rust.build.probe_toolchain",
+        lambda _target, _env: probe("toolchain"),
+    )
+    for ext in cmd.extensions:
+        monkeypatch.setattr(ext, "metadata", lambda *, quiet, ext=ext: probe(ext.name))
+
+    # all probes must be in flight at once for the barrier to release them
+    cmd._preflight()
+    assert sorted(probed) == ["a", "b", "toolchain", "version"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="extensions aren't stripped")
+def test_link_time_strip(monkeypatch):
+    monkeypatch.delenv("SETUPTOOLS_RUST_CARGO_PROFILE", raising=False)
+    cmd = build_rust(Distribution())
+    cmd.initialize_options()
+    cmd.release = True
+    ext = RustExtension("foo", strip=Strip.All, args=["--profile", "dist-fast"])
+    toolchain = ToolchainInfo("rustc 1.80.0 (051478957 2024-07-21)", "host", None, {})
+
+    env = {}
+    cmd._set_strip_profile(env, ext, toolchain)
+    assert env == {"CARGO_PROFILE_DIST_FAST_STRIP": "symbols"}
+
+    # rustc older than 1.59 falls back to running `strip` after installing
+    old_toolchain = toolchain._replace(
+        version_verbose="rustc 1.58.1 (db9d1b20b 2022-01-20)"
+    )
+    env = {}
+    cmd._set_strip_profile(env, ext, old_toolchain)
+    assert env == {}
+
+
+def test_cargo_timings_args():
+    cmd = build_rust(Distribution())
+    cmd.initialize_options()
+    cmd.cargo_timings = "html"
+
+    ext = RustExtension("foo", "Cargo.toml", binding=Binding.NoBinding)
+    assert cmd._cargo_args(ext, release=True, quiet=True)[-1] == "--timings"
+
+    ext.cargo_timings = "html,json"
+    assert cmd._cargo_args(ext, release=True, quiet=True)[-2:] == [
+        "--timings=html,json",
+        "-Zunstable-options",
+    ]
+
+    ext.cargo_timings = "svg"
+    with pytest.raises(SetupError):
+        cmd._cargo_args(ext, release=True, quiet=True)
+
+
+def test_new_cargo_timing_report(tmp_path):
+    reports_dir = tmp_path / "cargo-timings"
+    assert _cargo_timing_reports(None) == set()
+    assert _cargo_timing_reports(str(reports_dir)) == set()
+
+    reports_dir.mkdir()
+    (reports_dir / "cargo-timing-20240101T000000Z.html").write_text("old")
+    (reports_dir / "cargo-timing.html").write_text("another build")
+    previous = _cargo_timing_reports(str(reports_dir))
+    assert previous == {"cargo-timing-20240101T000000Z.html"}
+    assert _new_cargo_timing_report(str(reports_dir), previous) is None
+
+    # the shared report may already be another build's, so take this run's own
+    (reports_dir / "cargo-timing-20240101T000100Z.html").write_text("ours")
+    report = _new_cargo_timing_report(str(reports_dir), previous)
+    assert report == str(reports_dir / "cargo-timing-20240101T000100Z.html")
+
+
+def test_cached_target_dir(tmp_path, monkeypatch):
+    cmd = build_rust(Distribution({"name": "my-project"}))
+    cmd.initialize_options()
+    cmd._target_cache_root = tmp_path / "targets"
+    monkeypatch.delenv("CARGO_TARGET_DIR", raising=False)
+
+    target_dirs = []
+    for project in ("a", "b"):
+        root = tmp_path / project
+        root.mkdir()
+        monkeypatch.chdir(root)
+        ext = RustExtension("foo", "rust/Cargo.toml")
+        metadata = {"workspace_root": str(root / "rust")}
+        monkeypatch.setattr(ext, "metadata", lambda quiet: metadata)
+        target_dirs.append(cmd._cached_target_dir(ext))
+
+    # the same project extracted to different places shares its target directory
+    assert target_dirs[0] == target_dirs[1]
+    assert target_dirs[0].startswith(str(tmp_path / "targets" / "my-project-"))
+
+    ext = RustExtension("foo", "rust/Cargo.toml", env={"CARGO_TARGET_DIR": "t"})
+    assert cmd._cached_target_dir(ext) is None
+
+
+def test_replace_cross_target_dir(monkeypatch):
+    ext = RustExtension("foo", "Cargo.toml")
+    target_dirs = {"cross": "/target", "cargo": "/project/target"}
+    monkeypatch.setattr(
+        ext, "_metadata", lambda cargo, quiet: {"target_directory": target_dirs[cargo]}
+    )
+    path = "/target/release/libfoo.so"
+    assert (
+        _replace_cross_target_dir(path, ext, None, quiet=True)
+        == "/project/target/release/libfoo.so"
+    )
+    # builds in the persistent target directory find their artifacts there
+    assert (
+        _replace_cross_target_dir(path, ext, "/cache/targets/foo", quiet=True)
+        == "/cache/targets/foo/release/libfoo.so"
+    )
+
+
+def test_interpreter_builds():
+    from setuptools_rust._interpreters import Interpreter
+
+    modules = RustExtension("mod", "Cargo.toml")
+    abi3 = RustExtension("abi3", "Cargo.toml", py_limited_api=True)
+    exe = RustExtension("exe", "Cargo.toml", binding=Binding.Exec)
+    cmd = build_rust(Distribution())
+    cmd.initialize_options()
+    cmd.extensions = [modules, abi3, exe]
+    assert cmd._interpreter_builds() == [(None, cmd.extensions)]
+
+    py310 = Interpreter("python3.10", "3.10.0", ".cpython-310-x86_64-linux-gnu.so")
+    py311 = Interpreter("python3.11", "3.11.0", ".cpython-311-x86_64-linux-gnu.so")
+    cmd._interpreters = [py310, py311]
+    assert cmd._interpreter_builds() == [
+        (py310, [modules, abi3, exe]),
+        (py311, [modules]),
+    ]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="no pyo3 config on Windows")
+def test_pyo3_config_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("SETUPTOOLS_RUST_CACHE_DIR", str(tmp_path))
+    for variable in ("PYO3_PYTHON", "PYO3_CONFIG_FILE", "PYO3_CROSS_LIB_DIR"):
+        monkeypatch.delenv(variable, raising=False)
+    ext = RustExtension("foo", "Cargo.toml", binding=Binding.PyO3)
+
+    env = _prepare_build_environment(NO_ENV, ext, pyo3_abi3=True)
+    config = Path(env["PYO3_CONFIG_FILE"]).read_text()
+    assert "abi3=true\n" in config
+    assert f"version={sys.version_info[0]}.{sys.version_info[1]}\n" in config
+    # unchanged configurations reuse the same file
+    again = _prepare_build_environment(NO_ENV, ext, pyo3_abi3=True)
+    assert again["PYO3_CONFIG_FILE"] == env["PYO3_CONFIG_FILE"]
+
+    assert "PYO3_CONFIG_FILE" not in _prepare_build_environment(NO_ENV, ext)
+    cross = Env({**os.environ, "PYO3_CROSS_LIB_DIR": "/sysroot/lib"})
+    assert "PYO3_CONFIG_FILE" not in _prepare_build_environment(
+        cross, ext, pyo3_abi3=True
+    )
+
+
+def test_generated_files_inplace_then_build(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pkg").mkdir()
+    out_dir = tmp_path / "out"
+    (out_dir / "gen").mkdir(parents=True)
+    (out_dir / "gen" / "f1.txt").write_text("1")
+    ext = RustExtension("pkg.foo", "Cargo.toml", generated_files={"gen": "pkg"})
+
+    def install(inplace):
+        dist = Distribution({"packages": ["pkg"]})
+        dist.rust_extensions = [ext]
+        cmd = build_rust(dist)
+        cmd.inplace = inplace
+        cmd.ensure_finalized()
+        return cmd._install_generated_files(ext, out_dir)
+
+    assert [Path(p).resolve() for p in install(True)] == [tmp_path / "pkg" / "gen"]
+    install(False)
+    # the build into the build directory leaves the inplace files alone
+    assert (tmp_path / "pkg" / "gen" / "f1.txt").read_text() == "1"
+    assert list(tmp_path.glob("build/lib*/pkg/gen/f1.txt"))
+
+    # files no longer generated are still removed from each destination
+    (out_dir / "gen" / "f1.txt").unlink()
+    (out_dir / "gen" / "f2.txt").write_text("2")
+    install(True)
+    assert not (tmp_path / "pkg" / "gen" / "f1.txt").exists()
+    assert (tmp_path / "pkg" / "gen" / "f2.txt").exists()
@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from pytest import MonkeyPatch
+
+from setuptools_rust import extension
+from setuptools_rust._cache import DiskCache, file_lock
+from setuptools_rust.extension import RustExtension
+
+
+def test_disk_cache_evicts_least_recently_used(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("SETUPTOOLS_RUST_CACHE_DIR", str(tmp_path))
+    cache = DiskCache("test", max_bytes=200)
+    cache.put("a", "x" * 40)
+    cache.put("b", "x" * 40)
+    os.utime(tmp_path / "test" / "a.json", (1000, 1000))
+    os.utime(tmp_path / "test" / "b.json", (2000, 2000))
+    # reading an entry marks it as recently used
+    assert cache.get("a") == "x" * 40
+    assert cache.get("missing") is None
+
+    cache.put("c", "x" * 40)
+    assert sorted(p.stem for p in (tmp_path / "test").iterdir()) == ["a", "c"]
+
+
+def test_metadata_cache(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("SETUPTOOLS_RUST_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(extension, "get_cargo_version", lambda *_: "cargo 1.80.0")
+    monkeypatch.setattr(
+        extension,
+        "_METADATA_CACHE",
+        DiskCache("metadata", max_bytes=1024 * 1024),
+    )
+    manifest = tmp_path / "Cargo.toml"
+    manifest.write_text('[package]\nname = "foo"\n')
+    calls = []
+
+    def fake_metadata(*args, **kwargs):
+        calls.append(args)
+        return json.dumps(
+            {
+                "workspace_root": str(tmp_path),
+                "packages": [{"manifest_path": str(manifest), "source": None}],
+            }
+        )
+
+    monkeypatch.setattr(extension, "check_subprocess_output", fake_metadata)
+
+    RustExtension("foo", path=str(manifest)).metadata(quiet=True)
+    RustExtension("foo", path=str(manifest)).metadata(quiet=True)
+    assert len(calls) == 1
+
+    manifest.write_text('[package]\nname = "foo"\nversion = "0.2.0"\n')
+    RustExtension("foo", path=str(manifest)).metadata(quiet=True)
+    assert len(calls) == 2
+
+    monkeypatch.setenv("SETUPTOOLS_RUST_METADATA_CACHE", "0")
+    RustExtension("foo", path=str(manifest)).metadata(quiet=True)
+    assert len(calls) == 3
+
+
+def test_file_lock(tmp_path: Path) -> None:
+    path = tmp_path / "target.lock"
+    events = []
+
+    def other() -> None:
+        with file_lock(path):
+            events.append("other")
+
+    with file_lock(path):
+        thread = threading.Thread(target=other)
+        thread.start()
+        thread.join(0.2)
+        # still waiting for the lock
+        assert thread.is_alive()
+        events.append("first")
+    thread.join()
+    assert events == ["first", "other"]
@@ -0,0 +1,64 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from setuptools.errors import SetupError
+
+from setuptools_rust._compiler_cache import CompilerCache, find_compiler_cache
+
+STATS = {
+    "stats": {
+        "cache_hits": {"counts": {"Rust": 5}, "adv_counts": {}},
+        "cache_misses": {"counts": {"Rust": 2}, "adv_counts": {}},
+    }
+}
+
+
+@pytest.fixture
+def fake_sccache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    if sys.platform == "win32":
+        pytest.skip("the fake sccache is a shell script")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    sccache = bin_dir / "sccache"
+    sccache.write_text(f"#!/bin/sh\necho '{json.dumps(STATS)}'\n")
+    sccache.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir))
+    return sccache
+
+
+def test_find_compiler_cache(fake_sccache: Path) -> None:
+    assert find_compiler_cache("off", None) is None
+    assert find_compiler_cache("auto", "cache") == CompilerCache(
+        str(fake_sccache), "cache"
+    )
+    assert find_compiler_cache("sccache", None) == CompilerCache(
+        str(fake_sccache), None
+    )
+    with pytest.raises(SetupError):
+        find_compiler_cache("ccache", None)
+
+
+def test_find_missing_compiler_cache(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("PATH", str(tmp_path))
+    assert find_compiler_cache("auto", None) is None
+    with pytest.raises(SetupError):
+        find_compiler_cache("sccache", None)
+
+
+def test_apply() -> None:
+    cache = CompilerCache("/bin/sccache", "cache")
+    env_vars = {"RUSTC_WRAPPER": "other"}
+    cache.apply(env_vars)
+    assert env_vars == {"RUSTC_WRAPPER": "other"}
+
+    env_vars = {}
+    cache.apply(env_vars)
+    assert env_vars["RUSTC_WRAPPER"] == "/bin/sccache"
+    assert Path(env_vars["SCCACHE_DIR"]).is_absolute()
+
+
+def test_stats(fake_sccache: Path) -> None:
+    assert CompilerCache(str(fake_sccache), None).stats() == {"hits": 5, "misses": 2}
+    assert CompilerCache("/does/not/exist", None).stats() is None
@@ -0,0 +1,64 @@
+import json
+import threading
+from pathlib import Path
+
+from setuptools_rust.events import (
+    ChromeTraceSink,
+    EventDispatcher,
+    EventKind,
+    JsonLinesSink,
+)
+
+
+def test_dispatcher_serializes_sinks(tmp_path: Path) -> None:
+    path = tmp_path / "events.jsonl"
+    dispatcher = EventDispatcher()
+    assert not dispatcher
+    # nothing is recorded until a sink is registered
+    dispatcher.emit(EventKind.BUILD_STARTED, extensions=2)
+
+    received = []
+    dispatcher.add_sink(received.append)
+    dispatcher.add_sink(JsonLinesSink(str(path)))
+
+    threads = [
+        threading.Thread(
+            target=dispatcher.emit,
+            args=(EventKind.COPY, f"ext{i}"),
+            kwargs={"duration": 0.5, "source": "a", "destination": "b"},
+        )
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(event.extension for event in received) == [
+        f"ext{i}" for i in range(8)
+    ]
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 8
+    assert lines[0]["kind"] == "copy"
+    assert lines[0]["duration"] == 0.5
+    assert lines[0]["source"] == "a"
+
+
+def test_chrome_trace_sink(tmp_path: Path) -> None:
+    path = tmp_path / "timings.json"
+    dispatcher = EventDispatcher()
+    dispatcher.add_sink(ChromeTraceSink(str(path)))
+
+    dispatcher.emit(EventKind.BUILD_STARTED, timestamp=1.0, extensions=1)
+    dispatcher.emit(EventKind.COPY, "foo", timestamp=2.0, duration=0.5, source="a")
+    assert not path.exists()
+    dispatcher.emit(EventKind.BUILD_FINISHED, timestamp=3.0)
+
+    trace = json.loads(path.read_text())["traceEvents"]
+    assert [event["ph"] for event in trace] == ["M", "i", "X", "i"]
+    copy = trace[2]
+    assert copy["name"] == "copy foo"
+    assert copy["ts"] == 2_000_000
+    assert copy["dur"] == 500_000
+    assert copy["args"] == {"source": "a"}
+    assert len({event["tid"] for event in trace}) == 1
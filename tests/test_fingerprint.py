@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from setuptools_rust._fingerprint import (
+    dep_info_sources,
+    fingerprint_is_fresh,
+    write_fingerprint,
+)
+
+
+def test_fingerprint_freshness(tmp_path: Path) -> None:
+    source = tmp_path / "lib.rs"
+    source.write_text("fn main() {}")
+    artifact = tmp_path / "libfoo.so"
+    artifact.write_bytes(b"\x7fELF")
+    (tmp_path / "libfoo.d").write_text(f"{artifact}: {source}\n")
+    installed = tmp_path / "foo.so"
+    installed.write_bytes(b"\x7fELF")
+    fingerprint = tmp_path / "foo.fingerprint.json"
+
+    sources = dep_info_sources(str(artifact))
+    assert sources == [str(source)]
+    write_fingerprint(fingerprint, "config", sources, [str(installed)])
+    assert fingerprint_is_fresh(fingerprint, "config")
+    assert not fingerprint_is_fresh(fingerprint, "other config")
+
+    # Same content with a new mtime is still fresh
+    source.write_text("fn main() {}")
+    assert fingerprint_is_fresh(fingerprint, "config")
+
+    source.write_text("fn main() { println!() }")
+    assert not fingerprint_is_fresh(fingerprint, "config")
+
+    write_fingerprint(fingerprint, "config", sources, [str(installed)])
+    installed.unlink()
+    assert not fingerprint_is_fresh(fingerprint, "config")
+
+
+def test_dep_info_missing(tmp_path: Path) -> None:
+    assert dep_info_sources(str(tmp_path / "libfoo.so")) is None
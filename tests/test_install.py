@@ -0,0 +1,132 @@
+import os
+import shutil
+import sys
+import sysconfig
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from setuptools_rust._install import (
+    install_is_current,
+    place_file,
+    record_install,
+    remove_stale_files,
+    split_elf_debuginfo,
+    sync_tree,
+)
+
+
+@pytest.mark.parametrize("strategy", ["auto", "copy", "reflink", "hardlink"])
+def test_place_file(tmp_path: Path, strategy: str) -> None:
+    source = tmp_path / "libfoo.so"
+    source.write_bytes(b"artifact")
+    dest = tmp_path / "foo.so~"
+    # a leftover hardlink to the source must be replaced, not written through
+    os.link(source, dest)
+
+    method = place_file(str(source), str(dest), strategy, may_link=False)
+
+    assert method != "hardlink"
+    if strategy == "copy":
+        assert method == "copy"
+    assert dest.read_bytes() == b"artifact"
+    assert not os.path.samefile(source, dest)
+    dest.write_bytes(b"modified")
+    assert source.read_bytes() == b"artifact"
+
+
+def test_place_file_hardlink(tmp_path: Path) -> None:
+    source = tmp_path / "libfoo.so"
+    source.write_bytes(b"artifact")
+    dest = tmp_path / "foo.so~"
+
+    assert place_file(str(source), str(dest), "hardlink", may_link=True) == "hardlink"
+    assert os.path.samefile(source, dest)
+
+
+def test_install_record(tmp_path: Path) -> None:
+    source = tmp_path / "libfoo.so"
+    source.write_bytes(b"artifact")
+    dest = tmp_path / "foo.so"
+    dest.write_bytes(b"stripped")
+    record = tmp_path / "record.json"
+
+    assert not install_is_current(record, str(source), str(dest), ["-x"])
+    record_install(record, str(source), str(dest), ["-x"])
+    assert install_is_current(record, str(source), str(dest), ["-x"])
+    assert not install_is_current(record, str(source), str(dest), ["-S"])
+
+    # rebuilt with identical content
+    source.write_bytes(b"artifact")
+    os.utime(source, ns=(0, 0))
+    assert install_is_current(record, str(source), str(dest), ["-x"])
+
+    source.write_bytes(b"changed!")
+    assert not install_is_current(record, str(source), str(dest), ["-x"])
+
+    source.write_bytes(b"artifact")
+    dest.write_bytes(b"modified")
+    assert not install_is_current(record, str(source), str(dest), ["-x"])
+
+
+@pytest.mark.skipif(
+    sys.platform in ("win32", "darwin") or shutil.which("objcopy") is None,
+    reason="requires ELF binaries and objcopy",
+)
+def test_split_elf_debuginfo(tmp_path: Path) -> None:
+    # any ELF shared object will do
+    lib_dynload = Path(sysconfig.get_path("platstdlib"), "lib-dynload")
+    extension = next(lib_dynload.glob("*.so"), None)
+    if extension is None:
+        pytest.skip("no extension modules in lib-dynload")
+    path = tmp_path / extension.name
+    shutil.copyfile(extension, path)
+    debug_path = tmp_path / "debug" / (extension.name + ".debug")
+
+    split_elf_debuginfo(str(path), str(debug_path))
+
+    assert debug_path.exists()
+    assert b".gnu_debuglink" in path.read_bytes()
+
+
+def test_sync_tree(tmp_path: Path) -> None:
+    source = tmp_path / "out" / "schemas"
+    (source / "nested").mkdir(parents=True)
+    for i in range(100):
+        (source / f"{i}.json").write_text(str(i))
+    (source / "nested" / "a.txt").write_text("a")
+    dest = tmp_path / "pkg" / "schemas"
+
+    files = sync_tree(source, dest)
+    assert len(files) == 101
+    assert (dest / "nested" / "a.txt").read_text() == "a"
+
+    # regenerated with the same content: the installed file is left untouched
+    (source / "0.json").write_text("0")
+    os.utime(dest / "0.json", ns=(1, 1))
+    (source / "1.json").write_text("changed")
+    sync_tree(source, dest)
+    assert (dest / "0.json").stat().st_mtime_ns == 1
+    assert (dest / "1.json").read_text() == "changed"
+
+    (source / "nested" / "a.txt").unlink()
+    remove_stale_files(files, sync_tree(source, dest), [str(tmp_path / "pkg")])
+    assert not (dest / "nested").exists()
+    assert (dest / "0.json").exists()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="auto doesn't hardlink on Windows")
+def test_place_file_copy_is_not_reflink(tmp_path: Path) -> None:
+    source = tmp_path / "libfoo.so"
+    source.write_bytes(b"artifact")
+    dest = tmp_path / "foo.so~"
+
+    # as on ext4, which has no FICLONE but copies with copy_file_range
+    with mock.patch("fcntl.ioctl", side_effect=OSError(95, "not supported")):
+        assert place_file(str(source), str(dest), "auto", may_link=True) == "hardlink"
+        assert os.path.samefile(source, dest)
+        dest.unlink()
+        assert place_file(str(source), str(dest), "reflink", may_link=True) == "copy"
+        assert dest.read_bytes() == b"artifact"
+        assert not os.path.samefile(source, dest)
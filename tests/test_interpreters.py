@@ -0,0 +1,26 @@
+import os
+import sys
+import sysconfig
+
+import pytest
+from setuptools.errors import SetupError
+
+from setuptools_rust._interpreters import find_interpreter, find_interpreters
+
+
+def test_find_interpreter():
+    interpreter = find_interpreter(sys.executable)
+    assert os.path.samefile(interpreter.executable, sys.executable)
+    assert interpreter.ext_suffix == sysconfig.get_config_var("EXT_SUFFIX")
+
+
+def test_find_interpreters_skips_same_abi():
+    interpreters = find_interpreters(f"{sys.executable}, {sys.executable},")
+    assert len(interpreters) == 1
+
+
+def test_find_interpreter_missing():
+    with pytest.raises(SetupError, match="can't find Python interpreter"):
+        find_interpreter("no-such-python")
+    with pytest.raises(SetupError, match="at least one"):
+        find_interpreters(" , ")
@@ -0,0 +1,128 @@
+import os
+from pathlib import Path
+
+import pytest
+from pytest import MonkeyPatch
+
+from setuptools_rust import rustc_info
+from setuptools_rust._cache import DiskCache
+from setuptools_rust._utils import Env
+
+
+@pytest.fixture(autouse=True)
+def clear_toolchain_caches():
+    rustc_info._rust_version_verbose.cache_clear()
+    rustc_info.get_rust_target_info.cache_clear()
+    yield
+    rustc_info._rust_version_verbose.cache_clear()
+    rustc_info.get_rust_target_info.cache_clear()
+
+
+_RUSTC_VV = """\
+rustc 1.80.0 (051478957 2024-07-21)
+binary: rustc
+host: x86_64-unknown-linux-gnu
+release: 1.80.0
+"""
+
+
+def test_toolchain_cache(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("SETUPTOOLS_RUST_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        rustc_info, "_TOOLCHAIN_CACHE", DiskCache("toolchain", max_bytes=1024)
+    )
+    calls = []
+
+    def fake_rustc(command, **kwargs):
+        calls.append(command)
+        return _RUSTC_VV
+
+    monkeypatch.setattr(rustc_info, "check_subprocess_output", fake_rustc)
+    env = Env(None)
+
+    assert str(rustc_info.get_rust_version(env)) == "1.80.0"
+    rustc_info._rust_version_verbose.cache_clear()
+    # a new process would hit the persistent cache
+    assert str(rustc_info.get_rust_version(env)) == "1.80.0"
+    assert len(calls) == 1
+
+    rustc_info._rust_version_verbose.cache_clear()
+    monkeypatch.setenv("RUSTUP_TOOLCHAIN", "nightly")
+    rustc_info.get_rust_version(env)
+    assert len(calls) == 2
+
+    rustc_info._rust_version_verbose.cache_clear()
+    monkeypatch.setenv("SETUPTOOLS_RUST_TOOLCHAIN_CACHE", "0")
+    rustc_info.get_rust_version(env)
+    assert len(calls) == 3
+
+
+def test_toolchain_cache_updated_toolchain(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("SETUPTOOLS_RUST_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(
+        rustc_info, "_TOOLCHAIN_CACHE", DiskCache("toolchain", max_bytes=1024)
+    )
+    calls = []
+
+    def fake_rustc(command, **kwargs):
+        calls.append(command)
+        return _RUSTC_VV
+
+    monkeypatch.setattr(rustc_info, "check_subprocess_output", fake_rustc)
+    monkeypatch.setattr(rustc_info.shutil, "which", lambda *args, **kwargs: "rustc")
+    rustup_home = tmp_path / "rustup"
+    monkeypatch.setenv("RUSTUP_HOME", str(rustup_home))
+    toolchain_bin = rustup_home / "toolchains" / "stable" / "bin"
+    toolchain_bin.mkdir(parents=True)
+    (toolchain_bin / "rustc").write_text("1.80.0")
+    (rustup_home / "update-hashes").mkdir()
+    (rustup_home / "update-hashes" / "stable").write_text("old")
+    directories = [rustup_home / "toolchains", rustup_home / "update-hashes"]
+    directory_times = [
+        (d.stat().st_atime_ns, d.stat().st_mtime_ns) for d in directories
+    ]
+    env = Env(None)
+
+    rustc_info.get_rust_version(env)
+    rustc_info._rust_version_verbose.cache_clear()
+    rustc_info.get_rust_version(env)
+    assert len(calls) == 1
+
+    # `rustup update` replaces the files of the toolchain in place
+    (toolchain_bin / "rustc").write_text("1.81.0")
+    (rustup_home / "update-hashes" / "stable").write_text("new hash")
+    for directory, times in zip(directories, directory_times):
+        os.utime(directory, ns=times)
+    rustc_info._rust_version_verbose.cache_clear()
+    rustc_info.get_rust_version(env)
+    assert len(calls) == 2
+
+
+def test_probe_toolchain(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("SETUPTOOLS_RUST_TOOLCHAIN_CACHE", "0")
+    calls = []
+
+    def fake_rustc(command, **kwargs):
+        calls.append(command)
+        if "--print" in command:
+            return 'target_env="musl"\nunix\n'
+        return _RUSTC_VV
+
+    monkeypatch.setattr(rustc_info, "check_subprocess_output", fake_rustc)
+    env = Env(None)
+    target = "x86_64-unknown-linux-musl"
+
+    toolchain = rustc_info.probe_toolchain(target, env)
+    assert str(toolchain.version) == "1.80.0"
+    assert toolchain.host == "x86_64-unknown-linux-gnu"
+    assert toolchain.target == target
+    assert toolchain.cfgs == {"target_env": "musl", "unix": None}
+    # one `rustc -Vv` answers the version and host queries
+    assert calls == [
+        ["rustc", "-Vv"],
+        ["rustc", "--print", "cfg", "--target", target],
+    ]
+    assert rustc_info.probe_toolchain(target, env) == toolchain
+    assert len(calls) == 2
@@ -0,0 +1,63 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from setuptools import Distribution
+
+from setuptools_rust import RustExtension
+from setuptools_rust._utils import check_subprocess_output
+from setuptools_rust.setuptools_ext import pyprojecttoml_config
+
+
+def test_hook_import_is_minimal():
+    # setuptools imports the hook's module for every project, so it must not
+    # import the build machinery.
+    script = (
+        "import json, sys, setuptools\n"
+        "before = set(sys.modules)\n"
+        "import setuptools_rust.setuptools_ext\n"
+        "print(json.dumps(sorted(set(sys.modules) - before)))\n"
+    )
+    output = check_subprocess_output(
+        [sys.executable, "-c", script], env=None, text=True
+    )
+    imported = set(json.loads(output))
+    assert imported <= {
+        "setuptools_rust",
+        "setuptools_rust.setuptools_ext",
+        "setuptools_rust.version",
+    }
+
+
+def test_pyprojecttoml_config_other_project(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text("[project]\nname = 'foo'\n")
+    dist = Distribution()
+    pyprojecttoml_config(dist)
+    assert getattr(dist, "rust_extensions", None) is None
+
+
+def test_pyprojecttoml_config(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text(
+        "[tool.setuptools-rust]\n"
+        "parallel = 2\n"
+        "[[tool.setuptools-rust.ext-modules]]\n"
+        'target = "foo.bar"\n'
+        'binding = "NoBinding"\n'
+    )
+    dist = Distribution()
+    pyprojecttoml_config(dist)
+    [ext] = dist.rust_extensions  # type: ignore[attr-defined]
+    assert isinstance(ext, RustExtension)
+    assert ext.name == "foo.bar"
+    assert dist.get_option_dict("build_rust")["parallel"] == ("pyproject.toml", 2)
+
+
+def test_lazy_attributes():
+    import setuptools_rust
+
+    assert "build_rust" in dir(setuptools_rust)
+    with pytest.raises(AttributeError):
+        setuptools_rust.does_not_exist  # noqa: B018
@@ -0,0 +1,195 @@
+import json
+from pathlib import Path
+
+import pytest
+from setuptools.errors import SetupError
+
+from setuptools_rust import _vendor
+from setuptools_rust._cache import file_digest
+from setuptools_rust._vendor import (
+    _index_entry,
+    prune_vendored_crates,
+    restore_vendor_cache,
+    store_vendor_cache,
+    vendor_cache_key,
+    vendor_local_registry,
+)
+
+
+def make_crate(vendor_dir: Path, name: str, manifest: str = "") -> Path:
+    crate_dir = vendor_dir / name
+    (crate_dir / "src" / "arch").mkdir(parents=True)
+    (crate_dir / "Cargo.toml").write_text(
+        f'[package]\nname = "{name}"\nversion = "1.0.0"\n{manifest}'
+    )
+    (crate_dir / "src" / "lib.rs").write_text("mod arch;\n")
+    (crate_dir / "src" / "arch" / "mod.rs").write_text("pub fn f() {}\n")
+    (crate_dir / "gen").mkdir()
+    (crate_dir / "gen" / "build.rs").write_text("fn main() {}\n")
+    (crate_dir / "import.lib").write_bytes(b"\0" * 1024)
+    checksums = {
+        "files": {
+            path.relative_to(crate_dir).as_posix(): file_digest(str(path))
+            for path in crate_dir.rglob("*")
+            if path.is_file()
+        },
+        "package": "0" * 64,
+    }
+    (crate_dir / ".cargo-checksum.json").write_text(json.dumps(checksums))
+    return crate_dir
+
+
+def test_prune_vendored_crates(tmp_path):
+    kept = make_crate(tmp_path, "libc")
+    pruned = make_crate(tmp_path, "windows-sys", 'build = "gen/build.rs"\n')
+    kept_files = sorted(kept.rglob("*"))
+
+    assert prune_vendored_crates(tmp_path, {("libc", "1.0.0")}) == ["windows-sys"]
+
+    assert sorted(kept.rglob("*")) == kept_files
+    assert sorted(p.relative_to(pruned).as_posix() for p in pruned.rglob("*")) == [
+        ".cargo-checksum.json",
+        "Cargo.toml",
+        "gen",
+        "gen/build.rs",
+        "src",
+        "src/lib.rs",
+    ]
+    assert (pruned / "src" / "lib.rs").read_text() == ""
+    checksums = json.loads((pruned / ".cargo-checksum.json").read_text())
+    assert checksums["package"] == "0" * 64
+    assert checksums["files"] == {
+        path: file_digest(str(pruned / path))
+        for path in ("Cargo.toml", "gen/build.rs", "src/lib.rs")
+    }
+
+
+def test_prune_nothing_vendored(tmp_path):
+    assert prune_vendored_crates(tmp_path / "vendor", set()) == []
+
+
+def test_vendor_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SETUPTOOLS_RUST_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "rust" / "src").mkdir(parents=True)
+    (tmp_path / "rust" / "src" / "lib.rs").write_text("")
+    (tmp_path / "rust" / "Cargo.toml").write_text(
+        '[package]\nname = "foo"\nversion = "0.1.0"\n'
+    )
+    manifests = ["rust/Cargo.toml"]
+    assert vendor_cache_key(manifests, [], None, None) is None
+
+    # the lockfile of an enclosing project doesn't pin this workspace's crates
+    (tmp_path / "Cargo.lock").write_text("version = 3\n")
+    assert vendor_cache_key(manifests, [], None, None) is None
+
+    (tmp_path / "rust" / "Cargo.lock").write_text("version = 3\n")
+    key = vendor_cache_key(manifests, [], None, None)
+    assert key is not None
+    assert vendor_cache_key(manifests, [], ["x86_64-unknown-linux-gnu"], None) != key
+    assert not restore_vendor_cache(key, tmp_path / "restored")
+
+    make_crate(tmp_path / "vendor", "libc")
+    store_vendor_cache(key, tmp_path / "vendor")
+    assert restore_vendor_cache(key, tmp_path / "restored")
+    assert sorted(
+        p.relative_to(tmp_path / "restored") for p in (tmp_path / "restored").rglob("*")
+    ) == sorted(
+        p.relative_to(tmp_path / "vendor") for p in (tmp_path / "vendor").rglob("*")
+    )
+
+    (tmp_path / "rust" / "Cargo.lock").write_text("version = 4\n")
+    assert vendor_cache_key(manifests, [], None, None) != key
+
+
+def test_index_entry():
+    package = {
+        "name": "tokio",
+        "version": "1.0.0",
+        "features": {"full": ["rt"], "rt": [], "tracing": ["dep:tracing"]},
+        "links": None,
+        "rust_version": "1.63",
+        "dependencies": [
+            {
+                "name": "tracing",
+                "rename": None,
+                "req": "^0.1",
+                "kind": None,
+                "optional": True,
+                "uses_default_features": False,
+                "features": ["std"],
+                "target": None,
+                "registry": None,
+            },
+            {
+                "name": "windows-sys",
+                "rename": "windows",
+                "req": "^0.52",
+                "kind": "build",
+                "optional": False,
+                "uses_default_features": True,
+                "features": [],
+                "target": "cfg(windows)",
+                "registry": None,
+            },
+        ],
+    }
+    assert _index_entry(package, "ab" * 32) == {
+        "name": "tokio",
+        "vers": "1.0.0",
+        "deps": [
+            {
+                "name": "tracing",
+                "req": "^0.1",
+                "features": ["std"],
+                "optional": True,
+                "default_features": False,
+                "target": None,
+                "kind": "normal",
+            },
+            {
+                "name": "windows",
+                "package": "windows-sys",
+                "req": "^0.52",
+                "features": [],
+                "optional": False,
+                "default_features": True,
+                "target": "cfg(windows)",
+                "kind": "build",
+            },
+        ],
+        "cksum": "ab" * 32,
+        "features": {"full": ["rt"], "rt": []},
+        "features2": {"tracing": ["dep:tracing"]},
+        "v": 2,
+        "yanked": False,
+        "rust_version": "1.63",
+    }
+
+
+def test_vendor_local_registry_rejects_git_dependencies(tmp_path, monkeypatch):
+    metadata = {
+        "packages": [
+            {"name": "foo", "version": "0.1.0", "id": "foo", "source": None},
+            {
+                "name": "libc",
+                "version": "0.2.0",
+                "id": "libc",
+                "source": "registry+https://github.com/rust-lang/crates.io-index",
+            },
+            {
+                "name": "windep",
+                "version": "1.0.0",
+                "id": "windep",
+                "source": "git+https://example.com/windep#0123abc",
+            },
+        ]
+    }
+    monkeypatch.setattr(
+        _vendor,
+        "check_subprocess_output",
+        lambda args, env, **kwargs: json.dumps(metadata),
+    )
+    with pytest.raises(SetupError, match=r"windep 1\.0\.0 \(git\+https"):
+        vendor_local_registry(tmp_path / "vendor", ["Cargo.toml"], [], None, None)
+    assert not (tmp_path / "vendor").exists()